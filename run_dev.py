@@ -24,6 +24,10 @@ if __name__ == "__main__":
         host="127.0.0.1",
         port=5000,
         reload=True,
+        loop="asyncio",  # uvloop doesn't play well with reload in some setups
+        http="httptools",
+        ws="websockets",
+        ws_per_message_deflate=False,  # Broadcasts are compressed once in the app
         log_level="debug"
     )
 
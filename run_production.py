@@ -5,33 +5,114 @@ Uvicorn is a lightning-fast ASGI server that provides:
 - Async/await support for high concurrency
 - Multiple worker processes
 - 10-100x better performance than Flask dev server
+
+On Linux each worker binds its own SO_REUSEPORT listener so the kernel
+hash-distributes incoming connections across workers, instead of all
+workers competing to accept() on one shared socket (which loads them
+unevenly). Set REUSE_PORT=0 to use Uvicorn's shared-socket supervisor.
 """
 
+import os
+import socket
 import uvicorn
 import multiprocessing
 
+# uvloop (libuv event loop) isn't available on Windows - fall back to asyncio
+try:
+    import uvloop  # noqa: F401
+    LOOP = "uvloop"
+except ImportError:
+    LOOP = "asyncio"
+
+HOST = "0.0.0.0"
+PORT = 5000
+
+# Uvicorn settings shared by both serving modes
+SERVER_OPTIONS = {
+    "host": HOST,
+    "port": PORT,
+    "loop": LOOP,
+    "http": "httptools",
+    "ws": "websockets",
+    "ws_per_message_deflate": False,  # Broadcasts are compressed once in the app
+    "lifespan": "on",
+    "limit_concurrency": 1000,
+    "timeout_keep_alive": 5,
+    "log_level": "info"
+}
+
+# SO_REUSEPORT exists on Linux/BSD only
+REUSE_PORT = (hasattr(socket, "SO_REUSEPORT") and
+              os.getenv("REUSE_PORT", "1").lower() not in ("0", "false", "no"))
+
+
+def serve_worker():
+    """Run one Uvicorn server on its own SO_REUSEPORT listener"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((HOST, PORT))
+    
+    config = uvicorn.Config("src.api.app:app", **SERVER_OPTIONS)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def run_reuse_port(workers):
+    """Start one process per worker, each with its own listener"""
+    processes = []
+    for i in range(workers):
+        process = multiprocessing.Process(target=serve_worker, name=f"Uvicorn-{i+1}")
+        process.start()
+        processes.append(process)
+    
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Workers receive the same Ctrl+C and shut down on their own
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+
 if __name__ == "__main__":
     # Calculate optimal worker count (CPU cores)
     workers = multiprocessing.cpu_count()
     
+    # Split the Postgres connection budget across workers so the
+    # per-process pools don't exceed max_connections together. A worker
+    # can hold pool_size + max_overflow connections, so both come out of
+    # its share (no overflow by default), and DB_RESERVED_CONNECTIONS
+    # are left for the queue consumers and admin sessions
+    max_db_conns = int(os.getenv('DB_MAX_CONNECTIONS', '100'))
+    reserved_db_conns = int(os.getenv('DB_RESERVED_CONNECTIONS', '10'))
+    per_worker_conns = max((max_db_conns - reserved_db_conns) // workers, 1)
+    os.environ.setdefault('DB_MAX_OVERFLOW', '0')
+    db_overflow = int(os.environ['DB_MAX_OVERFLOW'])
+    os.environ.setdefault('DB_POOL_SIZE', str(max(per_worker_conns - db_overflow, 1)))
+    
+    # No template auto-reload in production, cache compiled bytecode
+    os.environ.setdefault('TEMPLATE_CACHE', '1')
+    
     print("=" * 60)
     print("Starting Log Aggregation API (Production Mode)")
     print("=" * 60)
     print("Server:  Uvicorn ASGI")
-    print("Host:    0.0.0.0")
-    print("Port:    5000")
+    print(f"Host:    {HOST}")
+    print(f"Port:    {PORT}")
     print(f"Workers: {workers}")
+    print(f"Loop:    {LOOP} (HTTP parser: httptools)")
+    print(f"Accept:  {'SO_REUSEPORT per worker' if REUSE_PORT else 'shared socket'}")
+    print(f"DB pool: {os.environ['DB_POOL_SIZE']} + {db_overflow} overflow connections per worker "
+          f"({reserved_db_conns} of {max_db_conns} reserved)")
     print("=" * 60)
     print("\n📊 API:  http://127.0.0.1:5000")
     print("📖 Docs: http://127.0.0.1:5000/api/docs")
     print("\nPress Ctrl+C to stop\n")
     
     # Run with multiple workers for production
-    uvicorn.run(
-        "src.api.app:app",
-        host="0.0.0.0",
-        port=5000,
-        workers=workers,
-        log_level="info"
-    )
-
+    if REUSE_PORT:
+        run_reuse_port(workers)
+    else:
+        uvicorn.run("src.api.app:app", workers=workers, **SERVER_OPTIONS)
@@ -3,23 +3,30 @@ Log Aggregation API
 """
 
 from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, Body
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy import func, select, text
 from datetime import datetime
 from pathlib import Path
+import os
 import math
+import time
 import uvicorn
 import asyncio
-import json
-from typing import List
-
-from ..database import get_database_engine  
-from .models import Log
+import jinja2
+import zlib
+import orjson
+import msgpack
+from typing import Any, Dict, List
+from pydantic import ValidationError
+
+from ..database import get_async_database_engine, get_pool_options
+from .models import Log, LogSource, LogApplication
+from .compression import DecompressingRoute
 from .schemas import (
-    LogCreate, LogFastResponse, QueueStatusResponse, ErrorResponse
+    LogCreate, LogFastResponse, LogBatchResponse, QueueStatusResponse, ErrorResponse
 )
 
 # Initialize FastAPI app
@@ -28,32 +35,86 @@ app = FastAPI(
     description="High-performance distributed log aggregation system",
     version="2.0.0",
     docs_url="/api/docs",  # Swagger UI at /api/docs
-    redoc_url="/api/redoc"  # ReDoc at /api/redoc
+    redoc_url="/api/redoc",  # ReDoc at /api/redoc
+    default_response_class=ORJSONResponse  # orjson is much faster than stdlib json
 )
 
+# Accept gzip/zstd request bodies (the shipper compresses its batches)
+app.router.route_class = DecompressingRoute
+
 # Redis producer for high-performance ingestion
 try:
-    from ..queue.redis_producer import RedisProducer
+    from ..queue.redis_producer import RedisProducer, BatchingProducer
     redis_producer = RedisProducer()
+    batching_producer = BatchingProducer(redis_producer)
     REDIS_ENABLED = True
     print("Redis producer initialized - high-performance mode enabled")
 except Exception as e:
     print(f"Redis not available: {e}")
     print("  Falling back to direct database writes")
     REDIS_ENABLED = False
-    redis_producer = None  
+    redis_producer = None
+    batching_producer = None
 
 # Setup Jinja2 templates for web UI
 template_dir = Path(__file__).parent.parent / 'web' / 'templates'
 templates = Jinja2Templates(directory=str(template_dir))
 
+# Production: compile templates once and cache bytecode on disk
+# (run_production.py sets TEMPLATE_CACHE=1, dev keeps auto-reload)
+if os.getenv('TEMPLATE_CACHE', '0') == '1':
+    templates.env.auto_reload = False
+    templates.env.cache_size = 400
+    templates.env.bytecode_cache = jinja2.FileSystemBytecodeCache()
+    templates.env.get_template("logs.html")  # Warm the cache at startup
+
 # Mount static files (images, css, js)
 static_dir = template_dir / 'images'
 app.mount("/static/images", StaticFiles(directory=str(static_dir)), name="static_images")
 
-# Database setup
-engine = get_database_engine()
-Session = sessionmaker(bind=engine)
+# Database setup (async so queries don't block the event loop)
+engine = get_async_database_engine()
+Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+# How often the pool monitor samples checked-out connections
+POOL_MONITOR_INTERVAL = 5
+
+# Most logs accepted in one POST /logs/batch (queued in one transaction)
+MAX_BATCH_LOGS = 1000
+
+
+async def monitor_db_pool():
+    """Periodically log connection pool saturation"""
+    pool_size = get_pool_options()['pool_size']
+    
+    while True:
+        await asyncio.sleep(POOL_MONITOR_INTERVAL)
+        
+        checked_out = engine.pool.checkedout()
+        overflow = max(engine.pool.overflow(), 0)
+        
+        # Only report when requests are waiting on (or spilling past) the pool
+        if checked_out >= pool_size:
+            print(f"DB pool saturated: {checked_out} checked out "
+                  f"(pool_size={pool_size}, overflow={overflow})")
+
+
+@app.on_event("startup")
+async def start_pool_monitor():
+    """Start the background pool monitor"""
+    app.state.pool_monitor = asyncio.create_task(monitor_db_pool())
+
+
+@app.on_event("startup")
+async def start_batching_producer():
+    """Start the batched Redis enqueue flusher"""
+    if REDIS_ENABLED:
+        await batching_producer.start()
+
+
+# WebSocket broadcast limits
+SEND_TIMEOUT = 5.0  # Seconds before a slow client is dropped
+CLIENT_QUEUE_SIZE = 1000  # Outbound messages buffered per client before eviction
 
 
 # WebSocket Connection Manager
@@ -62,13 +123,44 @@ class ConnectionManager:
     
     def __init__(self):
         self.active_connections: List[WebSocket] = []
-        self.redis_pubsub = None
+        # 'json' or 'msgpack', with a '+zlib' suffix for compressed clients
+        self.connection_formats: Dict[WebSocket, str] = {}
+        self.packer = msgpack.Packer(use_bin_type=True)
+        self._queues: Dict[WebSocket, asyncio.Queue] = {}  # Outbound buffer per client
+        self._tasks: Dict[WebSocket, asyncio.Task] = {}  # Sender task per client
         self.listener_task = None
         
     async def connect(self, websocket: WebSocket):
-        """Accept and register a new WebSocket connection"""
-        await websocket.accept()
+        """
+        Accept and register a new WebSocket connection.
+        
+        Clients opt into binary MessagePack frames with ?format=msgpack
+        and by offering the 'msgpack' subprotocol. The subprotocol is
+        only selected when the client offered it (RFC 6455 - clients
+        fail a handshake naming one they didn't offer); everyone else
+        gets JSON text frames. Adding ?compress=zlib sends
+        zlib-compressed binary frames, compressed once per broadcast and
+        shared by all such clients (per-connection permessage-deflate is
+        turned off in the server runners).
+        """
+        offered = websocket.scope.get('subprotocols', [])
+        if websocket.query_params.get('format') == 'msgpack' and 'msgpack' in offered:
+            await websocket.accept(subprotocol='msgpack')
+            frame_format = 'msgpack'
+        else:
+            await websocket.accept()
+            frame_format = 'json'
+        
+        if websocket.query_params.get('compress') == 'zlib':
+            frame_format += '+zlib'
+        
+        self.connection_formats[websocket] = frame_format
         self.active_connections.append(websocket)
+        
+        # Dedicated sender so broadcasts never wait on this client's socket
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self._queues[websocket] = queue
+        self._tasks[websocket] = asyncio.create_task(self._sender(websocket, queue))
         print(f"WebSocket connected. Total connections: {len(self.active_connections)}")
         
         # Start Redis listener if not already running
@@ -79,67 +171,212 @@ class ConnectionManager:
         """Remove a WebSocket connection"""
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
+        self.connection_formats.pop(websocket, None)
+        self._queues.pop(websocket, None)
+        
+        # Stop the sender task (unless it is the one disconnecting itself)
+        task = self._tasks.pop(websocket, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        
+        # No clients left on this worker - stop reading the WebSocket stream
+        # until the next connect, so idle workers don't pull its traffic
+        if not self.active_connections and self.listener_task is not None:
+            self.listener_task.cancel()
+            self.listener_task = None
         print(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
     
     async def broadcast(self, message: dict):
-        """Send message to all connected clients"""
-        if not self.active_connections:
+        """Queue a log dict for all connected clients"""
+        self._fan_out(
+            # Text frame - the web UI does JSON.parse(event.data)
+            lambda: orjson.dumps(message).decode(),
+            lambda: self.packer.pack(message)
+        )
+    
+    async def broadcast_raw(self, payload: bytes):
+        """
+        Queue an already JSON-encoded log (as read from Redis) for all
+        connected clients - forwarded as-is, no decode/re-encode round-trip.
+        Only msgpack clients need it parsed.
+        """
+        self._fan_out(
+            payload.decode,
+            lambda: self.packer.pack(orjson.loads(payload))
+        )
+    
+    def _fan_out(self, make_json, make_msgpack):
+        """
+        Put one message on every client's outbound queue.
+        
+        Backpressure policy: each client has a bounded outbound queue drained
+        by its own sender task. Publishing never waits on a socket - a client
+        whose queue is full has fallen too far behind and is evicted.
+        
+        Args:
+            make_json: Builds the JSON text frame
+            make_msgpack: Builds the MessagePack binary frame
+        """
+        if not self._queues:
             return
         
-        # Convert to JSON
-        json_message = json.dumps(message)
+        # Serialize (and compress) once per format, only for formats in use
+        frames = {}
         
-        # Send to all connections
-        disconnected = []
-        for connection in self.active_connections:
+        # Snapshot since evictions modify the dict
+        for connection, queue in list(self._queues.items()):
+            frame_format = self.connection_formats.get(connection, 'json')
+            
+            payload = frames.get(frame_format)
+            if payload is None:
+                base_format, _, compression = frame_format.partition('+')
+                
+                if base_format == 'msgpack':
+                    payload = frames.get('msgpack') or make_msgpack()
+                else:
+                    payload = frames.get('json') or make_json()
+                frames[base_format] = payload
+                
+                if compression == 'zlib':
+                    if isinstance(payload, str):
+                        payload = payload.encode()
+                    payload = zlib.compress(payload, 1)
+                    frames[frame_format] = payload
+            
             try:
-                await connection.send_text(json_message)
-            except Exception as e:
-                print(f"Error broadcasting to client: {e}")
-                disconnected.append(connection)
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                print("Evicting slow WebSocket client (outbound queue full)")
+                self.disconnect(connection)
+                asyncio.create_task(self._close(connection))
+    
+    async def _sender(self, websocket: WebSocket, queue: asyncio.Queue):
+        """Drain one client's outbound queue onto its socket"""
+        # Everything but plain JSON goes out as binary frames
+        if self.connection_formats.get(websocket) == 'json':
+            send = websocket.send_text
+        else:
+            send = websocket.send_bytes
         
-        # Remove disconnected clients
-        for conn in disconnected:
-            self.disconnect(conn)
+        try:
+            while True:
+                payload = await queue.get()
+                await asyncio.wait_for(send(payload), SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # WebSocketDisconnect, timeouts, broken sockets
+            print(f"Error broadcasting to client: {e!r}")
+            self.disconnect(websocket)
+    
+    async def _close(self, websocket: WebSocket):
+        """Close an evicted client's socket, ignoring errors"""
+        try:
+            await websocket.close(code=1013)  # Try again later
+        except Exception:
+            pass
     
     async def _listen_to_redis(self):
-        """Listen to Redis pub/sub for new logs"""
+        """
+        Follow the 'logs_ws' stream the queue workers append stored logs to.
+        
+        Plain XREAD rather than a consumer group - every API worker has its
+        own clients, so each must see every entry. Starts from '$' (new
+        entries only) and resumes from the last ID after each read.
+        """
         if not REDIS_ENABLED:
             return
         
+        redis_client = None
+        
         try:
             import redis.asyncio as aioredis
+            from ..queue._redis_pool import stream_entries
             
-            # Create async Redis client
+            # Create async Redis client (raw bytes - payloads are forwarded as-is)
             redis_client = await aioredis.from_url(
                 redis_producer.redis_url,
-                decode_responses=True
+                decode_responses=False,
+                protocol=3
             )
             
-            # Subscribe to log channel
-            pubsub = redis_client.pubsub()
-            await pubsub.subscribe('new_logs')
+            print("WebSocket: Following Redis stream 'logs_ws'")
             
-            print("WebSocket: Listening to Redis pub/sub channel 'new_logs'")
-            
-            # Listen for messages
-            async for message in pubsub.listen():
-                if message['type'] == 'message':
+            last_id = '$'
+            while True:
+                response = await redis_client.xread({'logs_ws': last_id}, count=500, block=5000)
+                
+                for message_id, fields in stream_entries(response):
+                    last_id = message_id
                     try:
-                        log_data = json.loads(message['data'])
-                        await self.broadcast(log_data)
+                        await self.broadcast_raw(fields[b'data'])
                     except Exception as e:
                         print(f"Error processing Redis message: {e}")
         
+        except asyncio.CancelledError:
+            print("WebSocket: Stopped listening to Redis (no clients)")
+            raise
         except Exception as e:
-            print(f"Redis pub/sub listener error: {e}")
+            print(f"Redis stream listener error: {e}")
             self.listener_task = None
+        finally:
+            if redis_client is not None:
+                await redis_client.aclose()
 
 
 # Initialize WebSocket manager
 ws_manager = ConnectionManager()
 
 
+# Dropdown options change slowly - refresh them at most once a minute
+FILTER_OPTIONS_TTL = 60
+_filter_options_cache = {'expires': 0.0, 'sources': [], 'applications': []}
+
+
+async def get_filter_options(session):
+    """Return (sources, applications) for the filter dropdowns, cached in-process"""
+    now = time.monotonic()
+    
+    if now >= _filter_options_cache['expires']:
+        # Small lookup tables maintained by the consumer - no scan of logs
+        sources = await session.scalars(select(LogSource.source))
+        applications = await session.scalars(select(LogApplication.application))
+        _filter_options_cache['sources'] = sorted(sources.all())
+        _filter_options_cache['applications'] = sorted(applications.all())
+        _filter_options_cache['expires'] = now + FILTER_OPTIONS_TTL
+    
+    return _filter_options_cache['sources'], _filter_options_cache['applications']
+
+
+# Below this many rows an exact COUNT(*) is cheap enough to keep
+EXACT_COUNT_THRESHOLD = 100_000
+
+
+async def count_all_logs(session):
+    """
+    Total number of logs for the unfiltered view.
+    
+    Uses the planner's row estimate from pg_class instead of scanning the
+    whole table. Falls back to an exact count for small tables and for
+    tables that haven't been analyzed yet (reltuples = -1).
+    
+    logs is partitioned, and autovacuum never analyzes a partitioned
+    parent, so the estimate is summed over its partitions (or taken from
+    logs itself on an unpartitioned install).
+    """
+    estimate = await session.scalar(text(
+        "SELECT SUM(GREATEST(c.reltuples, 0))::BIGINT FROM pg_class c "
+        "LEFT JOIN pg_inherits i ON i.inhrelid = c.oid "
+        "WHERE (i.inhparent = 'logs'::regclass OR c.oid = 'logs'::regclass) "
+        "AND c.relkind <> 'p'"
+    ))
+    
+    if estimate is None or estimate < EXACT_COUNT_THRESHOLD:
+        return await session.scalar(select(func.count(Log.id)))
+    
+    return estimate
+
+
 @app.get("/", response_class=HTMLResponse, tags=["Web UI"])
 async def index(
     request: Request,
@@ -147,70 +384,109 @@ async def index(
     source: str = Query("", description="Filter by source"),
     application: str = Query("", description="Filter by application"),
     search: str = Query("", description="Search in message"),
-    page: int = Query(1, ge=1, description="Page number")
+    page: int = Query(1, ge=1, description="Page number"),
+    count: bool = Query(False, description="Compute the exact total for filtered views")
 ):
    
-    session = Session()
+    per_page = 25
     
-    try:
-        per_page = 25
-        
-        # Build query with filters
-        query = session.query(Log)
-        
-        if level:
-            query = query.filter(Log.level == level)
-        if source:
-            query = query.filter(Log.source == source)
-        if application:
-            query = query.filter(Log.application == application)
-        if search:
-            query = query.filter(Log.message.ilike(f'%{search}%'))
-        
-        # Get total count
-        total = query.count()
+    # Build filter conditions
+    conditions = []
+    if level:
+        conditions.append(Log.level == level)
+    if source:
+        conditions.append(Log.source == source)
+    if application:
+        conditions.append(Log.application == application)
+    if search:
+        conditions.append(Log.message.ilike(f'%{search}%'))
+    
+    async with Session() as session:
+        offset = (page - 1) * per_page
         
-        # Calculate total pages
-        total_pages = math.ceil(total / per_page) if total > 0 else 1
+        if conditions and count:
+            # Get logs for current page (most recent first) with the total
+            # filtered count attached as a window function - one round-trip
+            result = await session.execute(
+                select(Log, func.count().over().label('total'))
+                    .where(*conditions)
+                    .order_by(Log.timestamp.desc())
+                    .limit(per_page)
+                    .offset(offset)
+            )
+            rows = result.all()
+            logs = [row.Log for row in rows]
+            
+            if rows:
+                total = rows[0].total
+            elif page > 1:
+                # Page past the end - window count has no rows to ride on
+                total = await session.scalar(
+                    select(func.count(Log.id)).where(*conditions)
+                )
+            else:
+                total = 0
+            
+            has_next = offset + len(logs) < total
+        else:
+            # Fetch one extra row to learn whether a next page exists
+            # without counting every match
+            result = await session.execute(
+                select(Log)
+                    .where(*conditions)
+                    .order_by(Log.timestamp.desc())
+                    .limit(per_page + 1)
+                    .offset(offset)
+            )
+            logs = result.scalars().all()
+            has_next = len(logs) > per_page
+            logs = logs[:per_page]
+            
+            if conditions:
+                # Filtered count is a scan - only on request (?count=1)
+                total = None
+            else:
+                # Unfiltered - use the table estimate, never show fewer
+                # than we know exist
+                total = max(await count_all_logs(session),
+                            offset + len(logs) + (1 if has_next else 0))
         
-        # Get logs for current page (most recent first)
-        logs = query.order_by(Log.timestamp.desc()) \
-                   .limit(per_page) \
-                   .offset((page - 1) * per_page) \
-                   .all()
+        # Calculate total pages (unknown when the total wasn't counted)
+        if total is None:
+            total_pages = None
+        else:
+            total_pages = math.ceil(total / per_page) if total > 0 else 1
         
         # Get stats (count by level)
-        stats = dict(session.query(Log.level, func.count(Log.id))
-                           .group_by(Log.level)
-                           .all())
+        result = await session.execute(
+            select(Log.level, func.count(Log.id)).group_by(Log.level)
+        )
+        stats = dict(result.all())
         
         # Get unique sources and applications for dropdowns
-        sources = [s[0] for s in session.query(Log.source).distinct().all()]
-        applications = [a[0] for a in session.query(Log.application).distinct().all()]
-        
-        return templates.TemplateResponse(
-            "logs.html",
-            {
-                "request": request,
-                "logs": logs,
-                "stats": stats,
-                "sources": sorted(sources),
-                "applications": sorted(applications),
-                "filters": {
-                    'level': level, 
-                    'source': source, 
-                    'application': application, 
-                    'search': search
-                },
-                "page": page,
-                "per_page": per_page,
-                "total": total,
-                "total_pages": total_pages
-            }
-        )
+        sources, applications = await get_filter_options(session)
     
-    finally:
-        session.close()
+    return templates.TemplateResponse(
+        "logs.html",
+        {
+            "request": request,
+            "logs": logs,
+            "stats": stats,
+            "sources": sources,
+            "applications": applications,
+            "filters": {
+                'level': level, 
+                'source': source, 
+                'application': application, 
+                'search': search
+            },
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "total_pages": total_pages,
+            "has_next": has_next
+        }
+    )
 
 
 @app.post(
@@ -237,11 +513,11 @@ async def insert_log(log: LogCreate):
         raise HTTPException(status_code=503, detail="Redis not available")
     
     try:
-        # Convert Pydantic model to dict for Redis
-        log_data = log.model_dump()
+        # Convert Pydantic model to dict for Redis (timestamp back to ISO string)
+        log_data = log.model_dump(mode='json')
         
-        # Enqueue to Redis (fast!)
-        message_id = redis_producer.enqueue(log_data)
+        # Enqueue to Redis - concurrent requests share one pipelined round trip
+        message_id = await batching_producer.enqueue(log_data)
         
         return LogFastResponse(
             status="success",
@@ -253,6 +529,57 @@ async def insert_log(log: LogCreate):
         raise HTTPException(status_code=500, detail=f"Queue error: {str(e)}")
 
 
+@app.post(
+    "/logs/batch",
+    response_model=LogBatchResponse,
+    status_code=202,
+    tags=["Log Ingestion"],
+    summary="Batch log ingestion via Redis queue",
+    responses={
+        202: {"description": "Logs queued for processing"},
+        400: {"model": ErrorResponse, "description": "Invalid request"},
+        422: {"model": ErrorResponse, "description": "No valid logs in the batch"},
+        500: {"model": ErrorResponse, "description": "Server error"},
+        503: {"model": ErrorResponse, "description": "Redis unavailable"}
+    }
+)
+async def insert_logs_batch(
+    logs: List[Any] = Body(..., min_length=1, max_length=MAX_BATCH_LOGS)
+):
+    """
+    **Queue many logs in one request (used by the log shipper).**
+    
+    Same validation and queueing as `POST /logs`, one HTTP round trip for
+    the whole JSON array (at most 1000 logs). Each log is validated on its
+    own: invalid ones are skipped and their indexes returned in `rejected`,
+    so one bad line doesn't lose its neighbours. The valid logs are queued
+    in one Redis transaction, so a failure never leaves part of the batch
+    queued.
+    """
+    if not REDIS_ENABLED:
+        raise HTTPException(status_code=503, detail="Redis not available")
+    
+    valid = []
+    rejected = []
+    for i, item in enumerate(logs):
+        try:
+            valid.append(LogCreate.model_validate(item).model_dump(mode='json'))
+        except ValidationError:
+            rejected.append(i)
+    
+    if not valid:
+        raise HTTPException(status_code=422, detail="No valid logs in batch")
+    
+    try:
+        # One MULTI/EXEC - a retried batch can't duplicate a queued half
+        await batching_producer.enqueue_many(valid)
+        
+        return LogBatchResponse(status="success", count=len(valid), rejected=rejected)
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Queue error: {str(e)}")
+
+
 @app.get(
     "/queue/status", 
     response_model=QueueStatusResponse,
@@ -320,8 +647,14 @@ async def parse_log_auto(raw_log: str = Body(..., embed=True)):
     ```
     """
     try:
-        # Detect format
-        detected_format = detect_format(raw_log)
+        # Parse (auto-detects the format in the same pass)
+        parsed = parser_factory.parse(raw_log)
+        
+        if parsed:
+            detected_format = parsed['metadata']['parser']
+        else:
+            # Only re-run detection to tell the two failure modes apart
+            detected_format = detect_format(raw_log)
         
         if not detected_format:
             return {
@@ -330,9 +663,6 @@ async def parse_log_auto(raw_log: str = Body(..., embed=True)):
                 "detected_format": None
             }
         
-        # Parse
-        parsed = parser_factory.parse(raw_log)
-        
         if not parsed:
             return {
                 "status": "error",
@@ -0,0 +1,87 @@
+"""
+Compressed request bodies.
+
+Clients (the log shipper) may send bodies with Content-Encoding gzip or
+zstd. DecompressingRoute decodes them before FastAPI parses and
+validates the JSON, so endpoints don't need to know about it.
+"""
+
+import zlib
+from typing import Callable
+
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+# zstd is optional - without it only gzip bodies are accepted
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Upper bound on a decompressed body (guards against compression bombs)
+MAX_DECOMPRESSED_BODY = 32 * 1024 * 1024
+
+
+def decompress_body(body, encoding):
+    """
+    Decode a request body according to its Content-Encoding
+    
+    Args:
+        body: Raw request bytes
+        encoding: Content-Encoding header value (lowercase)
+    
+    Returns:
+        Decompressed bytes
+    """
+    try:
+        if encoding == 'gzip':
+            decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            data = decoder.decompress(body, MAX_DECOMPRESSED_BODY)
+            if decoder.unconsumed_tail:
+                raise HTTPException(status_code=413, detail="Decompressed body too large")
+            return data
+        
+        if encoding == 'zstd' and zstandard is not None:
+            # decompress(max_output_size=...) ignores the cap when the frame
+            # declares its size, so check the declared size (-1 if unknown)
+            # and read at most one byte past the cap
+            if zstandard.frame_content_size(body) > MAX_DECOMPRESSED_BODY:
+                raise HTTPException(status_code=413, detail="Decompressed body too large")
+            with zstandard.ZstdDecompressor().stream_reader(body) as reader:
+                data = reader.read(MAX_DECOMPRESSED_BODY + 1)
+            if len(data) > MAX_DECOMPRESSED_BODY:
+                raise HTTPException(status_code=413, detail="Decompressed body too large")
+            return data
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid {encoding} body: {e}")
+    
+    raise HTTPException(status_code=415, detail=f"Unsupported Content-Encoding: {encoding}")
+
+
+class DecompressingRequest(Request):
+    """Request whose body() is decompressed per Content-Encoding"""
+    
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            encoding = self.headers.get("content-encoding", "identity").lower()
+            if encoding != "identity":
+                body = decompress_body(body, encoding)
+            self._body = body
+        return self._body
+
+
+class DecompressingRoute(APIRoute):
+    """APIRoute that hands endpoints a DecompressingRequest"""
+    
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+        
+        async def route_handler(request: Request) -> Response:
+            request = DecompressingRequest(request.scope, request.receive)
+            return await original_route_handler(request)
+        
+        return route_handler
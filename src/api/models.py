@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, String, Text, DateTime
+from sqlalchemy import Column, BigInteger, String, Text, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -7,11 +7,36 @@ Base = declarative_base()
 
 class Log(Base):
     __tablename__ = 'logs'
-    id = Column(BigInteger, primary_key=True)
-    timestamp = Column(DateTime(timezone=True), nullable=False)
+    # Mirrors src/data/schema.sql - composite indexes serve the web UI's
+    # filter + ORDER BY timestamp DESC + LIMIT query, trigram serves ILIKE
+    __table_args__ = (
+        Index('idx_timestamp', text('timestamp DESC')),
+        Index('idx_level_timestamp', 'level', text('timestamp DESC')),
+        Index('idx_source_timestamp', 'source', text('timestamp DESC')),
+        Index('idx_application_timestamp', 'application', text('timestamp DESC')),
+        Index('idx_message_trgm', 'message',
+              postgresql_using='gin', postgresql_ops={'message': 'gin_trgm_ops'}),
+    )
+    # Daily partitioning is set up by schema.sql only - create_all() here
+    # would make a partitioned table with no partitions to insert into.
+    # The key still matches: partitioned tables need it to include timestamp.
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    timestamp = Column(DateTime(timezone=True), primary_key=True)
     level = Column(String(10), nullable=False)
     source = Column(String(100), nullable=False)
     application = Column(String(100), nullable=False)
     message = Column(Text, nullable=False)
     log_metadata = Column('metadata', JSONB)  # Maps to 'metadata' column in database  
-    created_at = Column(DateTime(timezone=True), server_default='NOW()')  
+    created_at = Column(DateTime(timezone=True), server_default='NOW()')
+
+
+class LogSource(Base):
+    # Distinct sources, kept in sync by the queue consumer
+    __tablename__ = 'log_sources'
+    source = Column(String(100), primary_key=True)
+
+
+class LogApplication(Base):
+    # Distinct applications, kept in sync by the queue consumer
+    __tablename__ = 'log_applications'
+    application = Column(String(100), primary_key=True)
@@ -13,37 +13,32 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 
+# Accepted log levels (checked on every ingested log)
+VALID_LEVELS = frozenset({'DEBUG', 'INFO', 'WARN', 'WARNING', 'ERROR', 'CRITICAL', 'FATAL'})
+
+
 class LogCreate(BaseModel):
     """
     Schema for creating a new log entry.
     
     Used by /logs endpoint.
     """
-    timestamp: str = Field(..., description="ISO format timestamp")
+    # Parsed by pydantic-core directly - no separate fromisoformat() pass
+    timestamp: datetime = Field(..., description="ISO format timestamp")
     level: str = Field(..., description="Log level (INFO, WARN, ERROR, DEBUG)")
     source: str = Field(..., description="Log source identifier")
     application: str = Field(..., description="Application name")
     message: str = Field(..., description="Log message")
     metadata: Optional[Dict[str, Any]] = Field(None, description="Optional metadata as JSON object")
     
-    @field_validator('timestamp')
-    @classmethod
-    def validate_timestamp(cls, v):
-        """Ensure timestamp can be parsed"""
-        try:
-            datetime.fromisoformat(v)
-        except ValueError:
-            raise ValueError('timestamp must be in ISO format (YYYY-MM-DDTHH:MM:SS)')
-        return v
-    
     @field_validator('level')
     @classmethod
     def validate_level(cls, v):
         """Validate log level"""
-        valid_levels = {'DEBUG', 'INFO', 'WARN', 'WARNING', 'ERROR', 'CRITICAL', 'FATAL'}
-        if v.upper() not in valid_levels:
-            raise ValueError(f'level must be one of: {", ".join(valid_levels)}')
-        return v.upper()
+        level = v.upper()
+        if level not in VALID_LEVELS:
+            raise ValueError(f'level must be one of: {", ".join(sorted(VALID_LEVELS))}')
+        return level
     
     class Config:
         json_schema_extra = {
@@ -74,6 +69,24 @@ class LogFastResponse(BaseModel):
         }
 
 
+class LogBatchResponse(BaseModel):
+    """Response for Redis queue batch insertion"""
+    status: str = "success"
+    count: int
+    rejected: List[int] = Field(default_factory=list, description="Indexes of logs that failed validation (not queued)")
+    message: str = "Logs queued for processing"
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "success",
+                "count": 49,
+                "rejected": [7],
+                "message": "Logs queued for processing"
+            }
+        }
+
+
 class QueueStatusResponse(BaseModel):
     """Response for queue status endpoint"""
     status: str = "success"
@@ -1,16 +1,102 @@
+-- range-partitioned by timestamp into daily tables (logs_YYYYMMDD), so
+-- COPY batches land in a small, cache-resident partition with small
+-- indexes; the primary key has to include the partition key
 CREATE TABLE logs (
-    id BIGSERIAL PRIMARY KEY,
+    id BIGSERIAL,
     timestamp TIMESTAMPTZ NOT NULL,
     level VARCHAR(10) NOT NULL,
     source VARCHAR(100) NOT NULL,
     application VARCHAR(100) NOT NULL,
     message TEXT NOT NULL,
     log_metadata JSONB NOT NULL DEFAULT '{}',
-    created_at TIMESTAMPTZ DEFAULT NOW()
-);
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    -- hot Apache/Nginx metadata keys, computed by Postgres on insert so
+    -- they can be indexed (guarded so non-HTTP metadata never fails a cast)
+    ip TEXT GENERATED ALWAYS AS (log_metadata->>'ip') STORED,
+    status_code INT GENERATED ALWAYS AS (
+        CASE WHEN log_metadata->>'status_code' ~ '^[0-9]{1,3}$'
+             THEN (log_metadata->>'status_code')::INT END
+    ) STORED,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+-- rows outside every partition (old backfills, bad clocks) land here
+CREATE TABLE logs_default PARTITION OF logs DEFAULT;
+
+-- one UTC day per partition; inserts go through the parent and are routed.
+-- Postgres refuses to add a partition while logs_default holds rows in
+-- its range, so those rows are moved into the new partition first.
+-- Idempotent and safe to call concurrently (the queue consumers call it
+-- for each new day they see before writing a batch).
+CREATE OR REPLACE FUNCTION create_logs_partition(day DATE) RETURNS void AS $$
+DECLARE
+    part TEXT := 'logs_' || to_char(day, 'YYYYMMDD');
+    day_start TIMESTAMPTZ := day::timestamp AT TIME ZONE 'UTC';
+    day_end TIMESTAMPTZ := (day + 1)::timestamp AT TIME ZONE 'UTC';
+BEGIN
+    IF to_regclass(part) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    
+    -- one creator at a time; re-check once we have the lock
+    PERFORM pg_advisory_xact_lock(hashtext('create_logs_partition'));
+    IF to_regclass(part) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    
+    CREATE TEMP TABLE logs_partition_move ON COMMIT DROP AS
+    SELECT id, timestamp, level, source, application, message, log_metadata, created_at
+    FROM logs_default WITH NO DATA;
+    
+    WITH moved AS (
+        DELETE FROM logs_default
+        WHERE timestamp >= day_start AND timestamp < day_end
+        RETURNING id, timestamp, level, source, application, message, log_metadata, created_at
+    )
+    INSERT INTO logs_partition_move SELECT * FROM moved;
+    
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF logs FOR VALUES FROM (%L) TO (%L)',
+        part, day_start, day_end
+    );
+    
+    INSERT INTO logs (id, timestamp, level, source, application, message, log_metadata, created_at)
+    SELECT * FROM logs_partition_move;
+    DROP TABLE logs_partition_move;
+END;
+$$ LANGUAGE plpgsql;
 
--- log table indexes for performance
+-- last week through next week up front; later days are created on
+-- demand by the queue consumers
+SELECT create_logs_partition(day::date)
+FROM generate_series(CURRENT_DATE - 7, CURRENT_DATE + 7, INTERVAL '1 day') AS day;
+
+-- log table indexes for performance, created on every partition
+-- (web UI filters by one column and pages by newest first, so each filter
+--  column leads a composite index ending in timestamp DESC - index scan
+--  for the page instead of a sort)
 CREATE INDEX idx_timestamp ON logs(timestamp DESC);
-CREATE INDEX idx_level ON logs(level);
-CREATE INDEX idx_source ON logs(source);
-CREATE INDEX idx_log_metadata ON logs USING GIN(log_metadata);
\ No newline at end of file
+CREATE INDEX idx_level_timestamp ON logs(level, timestamp DESC);
+CREATE INDEX idx_source_timestamp ON logs(source, timestamp DESC);
+CREATE INDEX idx_application_timestamp ON logs(application, timestamp DESC);
+CREATE INDEX idx_log_metadata ON logs USING GIN(log_metadata);
+CREATE INDEX idx_ip_timestamp ON logs(ip, timestamp DESC) WHERE ip IS NOT NULL;
+CREATE INDEX idx_5xx_timestamp ON logs(timestamp DESC) WHERE status_code >= 500;
+
+-- trigram index so message ILIKE '%...%' searches don't seq scan
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX idx_message_trgm ON logs USING GIN(message gin_trgm_ops);
+
+-- distinct sources/applications for the web UI filter dropdowns
+-- (maintained by the queue consumer, avoids DISTINCT scans over logs)
+CREATE TABLE log_sources (
+    source VARCHAR(100) PRIMARY KEY
+);
+
+CREATE TABLE log_applications (
+    application VARCHAR(100) PRIMARY KEY
+);
+
+-- backfill lookup tables from existing logs
+INSERT INTO log_sources SELECT DISTINCT source FROM logs ON CONFLICT DO NOTHING;
+INSERT INTO log_applications SELECT DISTINCT application FROM logs ON CONFLICT DO NOTHING;
@@ -1,19 +1,54 @@
 # database.py
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_database_engine():
-    # create SQLAlchemy engine for PostgreSQL connection
+def _get_database_url():
+    # read the PostgreSQL connection string from the environment
     
     db_url = os.getenv('DB_URL')
     if not db_url:
         raise ValueError("value error: DB_URL environment variable not set")
+    return db_url
+
+def get_pool_options():
+    # connection pool sizing, tunable per deployment via env
+    # (run_production.py splits DB_MAX_CONNECTIONS across workers; a
+    # process can hold up to pool_size + max_overflow connections)
+    
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '20')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': True
+    }
+
+def get_database_engine():
+    # create SQLAlchemy engine for PostgreSQL connection
+    
+    db_url = _get_database_url()
     
     #print("Connecting with DB_URL =", os.getenv("DB_URL"))
-    return create_engine(db_url, echo=False, pool_pre_ping=True)
+    # batch executemany INSERTs (queue consumer) into 1000-row statements
+    return create_engine(db_url, echo=False, insertmanyvalues_page_size=1000,
+                         **get_pool_options())
+
+def get_async_database_engine():
+    # create async SQLAlchemy engine (asyncpg driver) for the API event loop
+    # async engines default to AsyncAdaptedQueuePool, don't pass a sync pool class
+    
+    db_url = make_url(_get_database_url()).set(drivername='postgresql+asyncpg')
+    return create_async_engine(db_url, echo=False, **get_pool_options())
+
+def get_asyncpg_dsn():
+    # plain postgresql:// URL (no SQLAlchemy driver suffix) for asyncpg.create_pool
+    
+    url = make_url(_get_database_url()).set(drivername='postgresql')
+    return url.render_as_string(hide_password=False)
 
 def test_connection():
     # test database connection
@@ -28,4 +63,4 @@ def test_connection():
         return False
 
 if __name__ == "__main__":
-    test_connection()
\ No newline at end of file
+    test_connection()
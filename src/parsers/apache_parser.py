@@ -11,10 +11,9 @@ Common: 127.0.0.1 - frank [10/Oct/2000:13:55:36 -0700] "GET /apache_pb.gif HTTP/
 Combined: 127.0.0.1 - frank [10/Oct/2000:13:55:36 -0700] "GET /apache_pb.gif HTTP/1.0" 200 2326 "http://example.com" "Mozilla/4.08"
 """
 
-import re
 from typing import Dict, Any, Optional
 from datetime import datetime
-from .base import LogParser
+from .base import LogParser, MONTHS, now_iso, regex_engine
 
 
 class ApacheParser(LogParser):
@@ -22,8 +21,11 @@ class ApacheParser(LogParser):
     Parser for Apache/Nginx Common and Combined Log Format.
     """
     
-    # Common Log Format regex
-    CLF_PATTERN = re.compile(
+    # Common Log Format regex with the Combined Log Format fields
+    # (referrer and user agent) as an optional tail - one pass for both.
+    # Leading \s* replaces a .strip() on the hot path.
+    APACHE_PATTERN = regex_engine.compile(
+        r'\s*'
         r'(?P<host>[\d\.]+)\s+'  # IP address
         r'(?P<ident>\S+)\s+'      # Identity (usually -)
         r'(?P<user>\S+)\s+'       # User (usually -)
@@ -31,19 +33,8 @@ class ApacheParser(LogParser):
         r'"(?P<request>[^"]+)"\s+'  # Request line
         r'(?P<status>\d{3})\s+'   # Status code
         r'(?P<size>\S+)'          # Response size
-    )
-    
-    # Combined Log Format regex (adds referrer and user agent)
-    COMBINED_PATTERN = re.compile(
-        r'(?P<host>[\d\.]+)\s+'
-        r'(?P<ident>\S+)\s+'
-        r'(?P<user>\S+)\s+'
-        r'\[(?P<time>[^\]]+)\]\s+'
-        r'"(?P<request>[^"]+)"\s+'
-        r'(?P<status>\d{3})\s+'
-        r'(?P<size>\S+)\s+'
-        r'"(?P<referrer>[^"]*)"\s+'  
-        r'"(?P<agent>[^"]*)"'         # User agent
+        r'(?:\s+"(?P<referrer>[^"]*)"'  # Referrer (combined only)
+        r'\s+"(?P<agent>[^"]*)")?'      # User agent (combined only)
     )
     
     def __init__(self):
@@ -51,8 +42,7 @@ class ApacheParser(LogParser):
     
     def can_parse(self, raw_log: str) -> bool:
         """Check if log matches Apache/Nginx format"""
-        return (self.COMBINED_PATTERN.match(raw_log.strip()) is not None or
-                self.CLF_PATTERN.match(raw_log.strip()) is not None)
+        return self.APACHE_PATTERN.match(raw_log) is not None
     
     def parse(self, raw_log: str) -> Optional[Dict[str, Any]]:
         """
@@ -62,20 +52,16 @@ class ApacheParser(LogParser):
         192.168.1.1 - - [11/Nov/2025:16:00:00 +0000] "GET /api/health HTTP/1.1" 200 45
         """
         try:
-            # Try combined format first (more specific)
-            match = self.COMBINED_PATTERN.match(raw_log.strip())
-            is_combined = True
-            
-            if not match:
-                # Fall back to common format
-                match = self.CLF_PATTERN.match(raw_log.strip())
-                is_combined = False
+            match = self.APACHE_PATTERN.match(raw_log)
             
             if not match:
                 return None
             
             data = match.groupdict()
             
+            # Combined format if the optional tail matched
+            is_combined = data['agent'] is not None
+            
             # Parse request line
             request_parts = data['request'].split()
             method = request_parts[0] if len(request_parts) > 0 else 'GET'
@@ -127,14 +113,30 @@ class ApacheParser(LogParser):
         Parse Apache timestamp format to ISO format.
         
         Format: 10/Oct/2000:13:55:36 -0700
+        
+        Fixed-width, so slice it directly instead of going through strptime.
         """
         try:
-            # Remove timezone for simplicity
+            # Timezone is dropped for simplicity
+            dt = datetime(
+                int(timestamp_str[7:11]),       # year
+                MONTHS[timestamp_str[3:6]],     # month
+                int(timestamp_str[0:2]),        # day
+                int(timestamp_str[12:14]),      # hour
+                int(timestamp_str[15:17]),      # minute
+                int(timestamp_str[18:20])       # second
+            )
+            return dt.isoformat()
+        except (KeyError, ValueError):
+            pass
+        
+        try:
+            # Unusual layout (e.g. single-digit day) - let strptime handle it
             time_part = timestamp_str.split()[0]
             dt = datetime.strptime(time_part, '%d/%b/%Y:%H:%M:%S')
             return dt.isoformat()
         except Exception:
-            return datetime.now().isoformat()
+            return now_iso()
     
     def _status_to_level(self, status_code: int) -> str:
         """
@@ -4,10 +4,59 @@ Base Log Parser Interface
 All parsers must implement this interface for consistency.
 """
 
+import os
+import re
+import time
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+# Optional google-re2 engine (linear-time DFA matching), opt in with USE_RE2=1.
+# Falls back to the standard library if the package isn't installed.
+regex_engine = re
+if os.getenv('USE_RE2', '').lower() in ('1', 'true', 'yes'):
+    try:
+        import re2 as regex_engine
+    except ImportError:
+        pass
+
+# Map common level variants (built once, not per normalize_level call)
+LEVEL_MAP = {
+    'WARNING': 'WARN',
+    'FATAL': 'CRITICAL',
+    'CRIT': 'CRITICAL',
+    'ERR': 'ERROR',
+    'NOTICE': 'INFO',
+    'TRACE': 'DEBUG'
+}
+
+# Month abbreviations for the hand-rolled timestamp parsers
+MONTHS = {
+    'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+    'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
+}
+
+# (epoch second, ISO text) for now_iso()
+_now = (0, '')
+
+
+def now_iso() -> str:
+    """
+    Current local time in ISO format, at one-second resolution.
+    
+    Used as the timestamp for lines that don't carry one. The string is
+    only rebuilt when the second changes, instead of formatting a new
+    datetime for every such line.
+    
+    Returns:
+        ISO format timestamp string
+    """
+    global _now
+    second = int(time.time())
+    if second != _now[0]:
+        _now = (second, datetime.fromtimestamp(second).isoformat())
+    return _now[1]
+
 
 class LogParser(ABC):
     """
@@ -71,18 +120,7 @@ class LogParser(ABC):
             Normalized level (INFO, WARN, ERROR, DEBUG, CRITICAL)
         """
         level_upper = level.upper()
-        
-        # Map common variants
-        level_map = {
-            'WARNING': 'WARN',
-            'FATAL': 'CRITICAL',
-            'CRIT': 'CRITICAL',
-            'ERR': 'ERROR',
-            'NOTICE': 'INFO',
-            'TRACE': 'DEBUG'
-        }
-        
-        return level_map.get(level_upper, level_upper)
+        return LEVEL_MAP.get(level_upper, level_upper)
     
     def parse_timestamp(self, timestamp_str: str, formats: list = None) -> str:
         """
@@ -114,8 +152,73 @@ class LogParser(ABC):
                 continue
         
         # If all parsing fails, return current time
-        return datetime.now().isoformat()
+        return now_iso()
     
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__}: {self.name}>"
 
+
+class ParseCache:
+    """
+    Bounded cache of parse results keyed by the raw log line.
+    
+    Log streams repeat lines (heartbeats, health checks), so a hit skips
+    the regex match and timestamp parsing. Entries whose line had no usable
+    timestamp are stored with timestamp None and get the current time on
+    every lookup. Each lookup returns a new dict (and metadata dict), since
+    callers add to the metadata.
+    """
+    
+    def __init__(self, maxsize: int = 4096):
+        """
+        Initialize cache.
+        
+        Args:
+            maxsize: Number of lines kept before the cache is cleared
+        """
+        self.maxsize = maxsize
+        self._entries: Dict[str, Dict[str, Any]] = {}
+    
+    def get(self, raw_log: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a previously parsed line.
+        
+        Args:
+            raw_log: Raw log line
+            
+        Returns:
+            Copy of the cached result, or None on a miss
+        """
+        parsed = self._entries.get(raw_log)
+        if parsed is None:
+            return None
+        return self._copy(parsed)
+    
+    def put(self, raw_log: str, parsed: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Store a parse result.
+        
+        Args:
+            raw_log: Raw log line
+            parsed: Parsed log dictionary (timestamp None if not in the line)
+            
+        Returns:
+            Copy of the result for the caller to hand out
+        """
+        if len(self._entries) >= self.maxsize:
+            # Start over rather than track recency on every hit
+            self._entries.clear()
+        self._entries[raw_log] = parsed
+        return self._copy(parsed)
+    
+    def clear(self):
+        """Drop all cached results"""
+        self._entries.clear()
+    
+    def _copy(self, parsed: Dict[str, Any]) -> Dict[str, Any]:
+        result = dict(parsed)
+        result['metadata'] = dict(parsed['metadata'])
+        if result['timestamp'] is None:
+            result['timestamp'] = now_iso()
+        return result
+
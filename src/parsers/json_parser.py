@@ -6,9 +6,17 @@ Most common format for modern microservices, Docker, and Kubernetes.
 """
 
 import json
-from typing import Dict, Any, Optional
-from datetime import datetime
-from .base import LogParser
+from itertools import chain
+from typing import Dict, Any, Optional, List
+from .base import LogParser, now_iso
+
+# orjson is several times faster than the stdlib parser on small lines.
+# Both accept surrounding whitespace, so lines don't need .strip() first.
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 
 class JSONParser(LogParser):
@@ -18,6 +26,9 @@ class JSONParser(LogParser):
     Supports flexible field mapping for different JSON schemas.
     """
     
+    # Field-group ids (index into _field_groups)
+    TIMESTAMP, LEVEL, SOURCE, APPLICATION, MESSAGE = range(5)
+    
     def __init__(self):
         super().__init__("JSON Lines")
         
@@ -27,14 +38,21 @@ class JSONParser(LogParser):
         self.source_fields = ['source', 'host', 'hostname', 'server', 'instance']
         self.app_fields = ['application', 'app', 'service', 'component', 'logger', 'name']
         self.message_fields = ['message', 'msg', 'text', 'log', 'event']
+        
+        # Every mapped key - anything else goes to metadata (built once, not per line)
+        self.used_fields = frozenset(chain(
+            self.timestamp_fields, self.level_fields, self.source_fields,
+            self.app_fields, self.message_fields
+        ))
+        
+        self._field_groups = (
+            self.timestamp_fields, self.level_fields, self.source_fields,
+            self.app_fields, self.message_fields
+        )
     
     def can_parse(self, raw_log: str) -> bool:
-        """Check if log is valid JSON"""
-        try:
-            json.loads(raw_log.strip())
-            return True
-        except (json.JSONDecodeError, ValueError):
-            return False
+        """Check if log looks like a JSON object (parse() does the real validation)"""
+        return raw_log.lstrip().startswith('{')
     
     def parse(self, raw_log: str) -> Optional[Dict[str, Any]]:
         """
@@ -45,53 +63,94 @@ class JSONParser(LogParser):
         {"time":"2025-11-11 16:00:00","severity":"error","msg":"Failed to connect"}
         """
         try:
-            data = json.loads(raw_log.strip())
+            data = json_loads(raw_log)
+        except ValueError:
+            # Not JSON - expected when the factory tries this parser first
+            return None
+        
+        return self._from_data(data)
+    
+    def parse_batch(self, raw_logs: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Parse many JSON lines in one call.
+        
+        Same result as calling parse() per line, without the per-line
+        method dispatch and global lookups.
+        
+        Args:
+            raw_logs: JSON log lines
             
+        Returns:
+            Parsed log dictionaries (None where a line isn't a JSON object),
+            in input order
+        """
+        loads = json_loads
+        from_data = self._from_data
+        results = []
+        append = results.append
+        
+        for raw_log in raw_logs:
+            try:
+                data = loads(raw_log)
+            except ValueError:
+                append(None)
+                continue
+            append(from_data(data))
+        
+        return results
+    
+    def _from_data(self, data: Any) -> Optional[Dict[str, Any]]:
+        """
+        Map a decoded JSON value onto the standard log fields.
+        
+        Args:
+            data: Decoded JSON value
+            
+        Returns:
+            Parsed log dictionary or None if data isn't an object
+        """
+        try:
             if not isinstance(data, dict):
                 return None
             
-            # Extract fields using flexible mapping
+            # Extract fields using flexible mapping. The timestamp and
+            # message fallbacks are only built when the field is missing.
+            timestamp = self._extract_field(data, self.TIMESTAMP)
+            message = self._extract_field(data, self.MESSAGE)
+            
             parsed = {
-                'timestamp': self._extract_field(data, self.timestamp_fields, 
-                                                datetime.now().isoformat()),
+                'timestamp': timestamp if timestamp is not None else now_iso(),
                 'level': self.normalize_level(
-                    self._extract_field(data, self.level_fields, 'INFO')
+                    self._extract_field(data, self.LEVEL, 'INFO')
                 ),
-                'source': self._extract_field(data, self.source_fields, 'json-log'),
-                'application': self._extract_field(data, self.app_fields, 'unknown'),
-                'message': self._extract_field(data, self.message_fields, str(data)),
-                'metadata': {}
+                'source': self._extract_field(data, self.SOURCE, 'json-log'),
+                'application': self._extract_field(data, self.APPLICATION, 'unknown'),
+                'message': message if message is not None else str(data),
+                # Add remaining fields to metadata
+                'metadata': {key: value for key, value in data.items()
+                             if key not in self.used_fields}
             }
             
-            # Add remaining fields to metadata
-            used_fields = set()
-            for field_list in [self.timestamp_fields, self.level_fields, 
-                             self.source_fields, self.app_fields, self.message_fields]:
-                used_fields.update(field_list)
-            
-            for key, value in data.items():
-                if key not in used_fields:
-                    parsed['metadata'][key] = value
-            
             return parsed
             
         except Exception as e:
             print(f"JSON parsing error: {e}")
             return None
     
-    def _extract_field(self, data: dict, possible_keys: list, default: str) -> str:
+    def _extract_field(self, data: dict, group: int,
+                       default: Optional[str] = None) -> Optional[str]:
         """
         Extract field from JSON using list of possible key names.
         
         Args:
             data: JSON data dictionary
-            possible_keys: List of possible field names to check
-            default: Default value if field not found
+            group: Field-group id (TIMESTAMP, LEVEL, SOURCE, APPLICATION, MESSAGE)
+            default: Default value if field not found (or null)
             
         Returns:
             Field value or default
         """
-        for key in possible_keys:
+        for key in self._field_groups[group]:
             if key in data:
                 value = data[key]
                 # Convert to string if not already
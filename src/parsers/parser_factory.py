@@ -4,12 +4,15 @@ Parser Factory
 Manages parser instances and provides auto-detection of log formats.
 """
 
-from typing import Dict, Any, Optional, List
+import mmap
+import os
+from collections import Counter
+from typing import Dict, Any, Optional, List, Iterator
 from .base import LogParser
 from .json_parser import JSONParser
 from .apache_parser import ApacheParser
 from .syslog_parser import SyslogParser
-from .regex_parser import RegexParser, PREDEFINED_PATTERNS
+from .regex_parser import RegexParser, PREDEFINED_PATTERNS, ASCII_SAFE_PATTERNS
 
 
 class ParserFactory:
@@ -19,16 +22,42 @@ class ParserFactory:
     Provides auto-detection and manual selection of parsers.
     """
     
+    # Re-sort custom parsers by hit count after this many custom matches
+    REORDER_INTERVAL = 1024
+    
     def __init__(self):
         """Initialize factory with all available parsers"""
+        self.json_parser = JSONParser()
+        apache_parser = ApacheParser()
+        syslog_parser = SyslogParser()
+        
         self.parsers: List[LogParser] = [
-            JSONParser(),
-            ApacheParser(),
-            SyslogParser(),
+            self.json_parser,
+            apache_parser,
+            syslog_parser,
         ]
         
+        # First-character dispatch: a leading '{' can only be JSON and a
+        # leading '<' can only be syslog, so skip the parsers that can't match.
+        # JSON objects and syslog priorities can't start with anything else,
+        # which leaves Apache as the only standard candidate for other lines.
+        self.first_char_parsers: Dict[str, List[LogParser]] = {
+            '{': [self.json_parser],
+            '<': [syslog_parser],
+        }
+        self.default_parsers: List[LogParser] = [apache_parser]
+        
+        # Standard parsers by lower-cased name for get_parser
+        self.parsers_by_name: Dict[str, LogParser] = {
+            parser.name.lower(): parser for parser in self.parsers
+        }
+        
         # Custom regex parsers (can be added by users)
         self.custom_parsers: Dict[str, RegexParser] = {}
+        
+        # Matches per custom parser - the busiest are tried first
+        self.custom_hits: Counter = Counter()
+        self._custom_matches = 0
     
     def parse(self, raw_log: str, parser_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
@@ -41,6 +70,10 @@ class ParserFactory:
         Returns:
             Parsed log dictionary or None if parsing fails
         """
+        # Strip once here - a parser's own strip() on the result then
+        # returns the same string instead of copying the line again
+        raw_log = raw_log.strip()
+        
         if parser_name:
             # Use specific parser
             parser = self.get_parser(parser_name)
@@ -61,25 +94,131 @@ class ParserFactory:
         Returns:
             Parsed log dictionary or None if no parser can handle it
         """
-        # Try each parser in order (most specific first)
-        for parser in self.parsers:
-            if parser.can_parse(raw_log):
-                result = parser.parse(raw_log)
-                if result:
-                    # Add parser info to metadata
-                    result['metadata']['parser'] = parser.name
-                    return result
+        # Strip once here rather than in every parser attempt
+        raw_log = raw_log.strip()
+        
+        # Try each parser in order (most specific first). parse() returns
+        # None when the format doesn't match, so calling can_parse() first
+        # would only repeat the same JSON decode / regex match.
+        candidates = self.first_char_parsers.get(raw_log[:1], self.default_parsers)
+        for parser in candidates:
+            result = parser.parse(raw_log)
+            if result:
+                # Add parser info to metadata
+                result['metadata']['parser'] = parser.name
+                return result
         
         # Try custom parsers
         for name, parser in self.custom_parsers.items():
-            if parser.can_parse(raw_log):
-                result = parser.parse(raw_log)
-                if result:
-                    result['metadata']['parser'] = f'custom:{name}'
-                    return result
+            result = parser.parse(raw_log)
+            if result:
+                result['metadata']['parser'] = f'custom:{name}'
+                self._count_custom_hit(name)
+                return result
         
         return None
     
+    def _count_custom_hit(self, name: str):
+        """
+        Record a custom parser match and periodically re-sort by hit count.
+        
+        A stream is usually dominated by one format, so trying its parser
+        first skips the regex matches that would fail. Overlapping patterns
+        resolve to whichever parser is tried first, so after a re-sort that
+        is the busier one rather than the one added first.
+        
+        Args:
+            name: Name of the custom parser that matched
+        """
+        self.custom_hits[name] += 1
+        self._custom_matches += 1
+        
+        if self._custom_matches % self.REORDER_INTERVAL == 0:
+            # Build a new dict rather than reorder in place, so a concurrent
+            # auto_parse iterating the old one isn't disturbed
+            self.custom_parsers = dict(sorted(
+                self.custom_parsers.items(),
+                key=lambda item: self.custom_hits[item[0]],
+                reverse=True
+            ))
+    
+    def parse_batch(self, raw_logs: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Auto-detect and parse a batch of logs.
+        
+        JSON lines are parsed together by JSONParser.parse_batch; other
+        lines (and JSON lines it rejects) go through auto_parse.
+        
+        Args:
+            raw_logs: Raw log strings to parse
+            
+        Returns:
+            Parsed log dictionaries (None where parsing failed), in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(raw_logs)
+        json_indexes = []
+        json_lines = []
+        
+        for i, raw_log in enumerate(raw_logs):
+            raw_log = raw_log.strip()
+            if raw_log.startswith('{'):
+                json_indexes.append(i)
+                json_lines.append(raw_log)
+            else:
+                results[i] = self.auto_parse(raw_log)
+        
+        name = self.json_parser.name
+        parsed_lines = self.json_parser.parse_batch(json_lines)
+        for i, raw_log, result in zip(json_indexes, json_lines, parsed_lines):
+            if result:
+                result['metadata']['parser'] = name
+            else:
+                # Let custom parsers have a go, as auto_parse would
+                result = self.auto_parse(raw_log)
+            results[i] = result
+        
+        return results
+    
+    def parse_file(self, path: str) -> Iterator[Optional[Dict[str, Any]]]:
+        """
+        Auto-detect and parse every line of a log file.
+        
+        The file is memory-mapped and split with mmap.find rather than read
+        into one large string first. JSON lines are handed to the decoder as
+        bytes (orjson takes them directly), so they skip the UTF-8 decode.
+        
+        Args:
+            path: Path to the log file
+            
+        Yields:
+            Parsed log dictionary (None where parsing failed), one per line
+        """
+        with open(path, 'rb') as f:
+            # mmap can't map an empty file
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                json_parser = self.json_parser
+                size = len(mm)
+                pos = 0
+                
+                while pos < size:
+                    end = mm.find(b'\n', pos)
+                    if end < 0:
+                        end = size
+                    line = mm[pos:end]
+                    pos = end + 1
+                    
+                    if line.lstrip()[:1] == b'{':
+                        result = json_parser.parse(line)
+                        if result:
+                            result['metadata']['parser'] = json_parser.name
+                            yield result
+                            continue
+                    
+                    yield self.auto_parse(line.decode('utf-8', errors='replace'))
+    
     def detect_format(self, raw_log: str) -> Optional[str]:
         """
         Detect the format of a raw log without parsing.
@@ -90,7 +229,7 @@ class ParserFactory:
         Returns:
             Parser name that can handle this format, or None
         """
-        for parser in self.parsers:
+        for parser in self._candidate_parsers(raw_log):
             if parser.can_parse(raw_log):
                 return parser.name
         
@@ -100,6 +239,19 @@ class ParserFactory:
         
         return None
     
+    def _candidate_parsers(self, raw_log: str) -> List[LogParser]:
+        """
+        Standard parsers that could handle this log, in priority order.
+        
+        Args:
+            raw_log: Raw log string
+            
+        Returns:
+            Subset of self.parsers narrowed by the first non-space character
+        """
+        first_char = raw_log.lstrip()[:1]
+        return self.first_char_parsers.get(first_char, self.default_parsers)
+    
     def get_parser(self, name: str) -> Optional[LogParser]:
         """
         Get a specific parser by name.
@@ -111,9 +263,9 @@ class ParserFactory:
             Parser instance or None if not found
         """
         # Check standard parsers
-        for parser in self.parsers:
-            if parser.name.lower() == name.lower():
-                return parser
+        parser = self.parsers_by_name.get(name.lower())
+        if parser:
+            return parser
         
         # Remove custom prefix from parsers
         if name.startswith('custom:'):
@@ -134,7 +286,8 @@ class ParserFactory:
             True if added successfully, False on error
         """
         try:
-            parser = RegexParser(pattern, f"Custom: {name}")
+            parser = RegexParser(pattern, f"Custom: {name}",
+                                 ascii_only=pattern in ASCII_SAFE_PATTERNS)
             
             # Validate pattern
             is_valid, issues = parser.validate_pattern()
@@ -161,6 +314,7 @@ class ParserFactory:
         """
         if name in self.custom_parsers:
             del self.custom_parsers[name]
+            self.custom_hits.pop(name, None)
             return True
         return False
     
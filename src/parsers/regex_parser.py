@@ -10,8 +10,7 @@ Example pattern:
 
 import re
 from typing import Dict, Any, Optional, List
-from datetime import datetime
-from .base import LogParser
+from .base import LogParser, ParseCache, regex_engine
 
 
 class RegexParser(LogParser):
@@ -26,21 +25,31 @@ class RegexParser(LogParser):
     # Optional but recommended groups
     OPTIONAL_GROUPS = ['timestamp', 'level', 'source', 'application']
     
-    def __init__(self, pattern: str = None, name: str = "Custom Regex"):
+    # Groups mapped to top-level fields - everything else goes to metadata
+    STANDARD_FIELDS = frozenset(REQUIRED_GROUPS + OPTIONAL_GROUPS)
+    
+    def __init__(self, pattern: str = None, name: str = "Custom Regex", ascii_only: bool = False):
         """
         Initialize custom regex parser.
         
         Args:
             pattern: Regex pattern with named groups
             name: Parser name for identification
+            ascii_only: Match \\d, \\w and \\s against ASCII only (faster). Only
+                   for patterns known to be ASCII-safe, like the predefined ones -
+                   user patterns may rely on Unicode classes
         """
         super().__init__(name)
         self.pattern_str = pattern
         self.pattern = None
+        self.flags = re.ASCII if ascii_only else 0
+        
+        # Results for repeated lines
+        self._cache = ParseCache()
         
         if pattern:
             try:
-                self.pattern = re.compile(pattern)
+                self.pattern = self._compile(pattern)
             except re.error as e:
                 raise ValueError(f"Invalid regex pattern: {e}")
     
@@ -52,11 +61,34 @@ class RegexParser(LogParser):
             pattern: Regex pattern with named groups
         """
         try:
-            self.pattern = re.compile(pattern)
+            self.pattern = self._compile(pattern)
             self.pattern_str = pattern
+            self._cache.clear()
         except re.error as e:
             raise ValueError(f"Invalid regex pattern: {e}")
     
+    def _compile(self, pattern: str):
+        """
+        Compile a user pattern, with re2 when enabled (USE_RE2=1).
+        
+        User patterns come in over the API, so re2's linear-time matching
+        keeps a badly written pattern from backtracking for seconds per line.
+        re2 rejects lookaround and backreferences - those patterns fall back
+        to the standard library.
+        
+        Args:
+            pattern: Regex pattern with named groups
+            
+        Returns:
+            Compiled pattern
+        """
+        if regex_engine is not re:
+            try:
+                return regex_engine.compile(pattern)
+            except Exception:  # re2.error isn't a re.error subclass
+                pass
+        return re.compile(pattern, self.flags)
+    
     def can_parse(self, raw_log: str) -> bool:
         """Check if log matches the custom pattern"""
         if not self.pattern:
@@ -77,7 +109,13 @@ class RegexParser(LogParser):
             return None
         
         try:
-            match = self.pattern.match(raw_log.strip())
+            line = raw_log.strip()
+            
+            parsed = self._cache.get(line)
+            if parsed:
+                return parsed
+            
+            match = self.pattern.match(line)
             
             if not match:
                 return None
@@ -87,25 +125,22 @@ class RegexParser(LogParser):
             # Ensure required fields exist
             if 'message' not in data:
                 # Use entire log as message if not captured
-                data['message'] = raw_log.strip()
+                data['message'] = line
             
-            # Build parsed log with defaults
+            # Build parsed log with defaults (no timestamp - the cache
+            # fills in the current time)
             parsed = {
-                'timestamp': data.get('timestamp', datetime.now().isoformat()),
+                'timestamp': data.get('timestamp'),
                 'level': self.normalize_level(data.get('level', 'INFO')),
                 'source': data.get('source', 'custom-log'),
                 'application': data.get('application', 'unknown'),
                 'message': data['message'],
-                'metadata': {}
+                # Add any extra captured groups to metadata
+                'metadata': {key: value for key, value in data.items()
+                             if key not in self.STANDARD_FIELDS and value is not None}
             }
             
-            # Add any extra captured groups to metadata
-            standard_fields = {'timestamp', 'level', 'source', 'application', 'message'}
-            for key, value in data.items():
-                if key not in standard_fields and value is not None:
-                    parsed['metadata'][key] = value
-            
-            return parsed
+            return self._cache.put(line, parsed)
             
         except Exception as e:
             print(f"Custom regex parsing error: {e}")
@@ -185,3 +220,6 @@ PREDEFINED_PATTERNS = {
     }
 }
 
+# Predefined patterns only use \d and \w for timestamps and levels, so
+# they can be compiled with re.ASCII
+ASCII_SAFE_PATTERNS = frozenset(p['pattern'] for p in PREDEFINED_PATTERNS.values())
@@ -13,7 +13,7 @@ Example:
 import re
 from typing import Dict, Any, Optional
 from datetime import datetime
-from .base import LogParser
+from .base import LogParser, ParseCache, MONTHS, now_iso
 
 
 class SyslogParser(LogParser):
@@ -21,7 +21,7 @@ class SyslogParser(LogParser):
     Parser for Syslog RFC 5424 format.
     """
     
-    # RFC 5424 syslog pattern
+    # RFC 5424 header - structured data and message are split by _split_structured
     RFC5424_PATTERN = re.compile(
         r'<(?P<pri>\d+)>'  # Priority
         r'(?P<version>\d+)\s+'  # Version
@@ -29,48 +29,62 @@ class SyslogParser(LogParser):
         r'(?P<hostname>\S+)\s+'  # Hostname
         r'(?P<appname>\S+)\s+'  # Application name
         r'(?P<procid>\S+)\s+'  # Process ID
-        r'(?P<msgid>\S+)\s+'  # Message ID
-        r'(?P<structured>(?:\[.*?\]|-)+)\s*'  # Structured data
-        r'(?P<message>.*)$'  # Message
+        r'(?P<msgid>\S+)\s+',  # Message ID
+        re.ASCII  # Syslog headers are ASCII - skip the Unicode class tables
     )
     
+    # One or more SD-ELEMENTs; a ']' inside a quoted PARAM-VALUE doesn't close one.
+    # Unrolled-loop form, so it runs in linear time without backtracking.
+    STRUCTURED_PATTERN = re.compile(
+        r'(?:\[[^\]"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^\]"]*)*\])+', re.DOTALL
+    )
+    
+    # Elements with unbalanced quotes - close on the first ']' (old behaviour)
+    LOOSE_STRUCTURED_PATTERN = re.compile(r'(?:\[[^\]]*\])+')
+    
     # Legacy RFC 3164 pattern (for backwards compatibility)
     RFC3164_PATTERN = re.compile(
         r'<(?P<pri>\d+)>'  # Priority
         r'(?P<timestamp>\w+\s+\d+\s+\d+:\d+:\d+)\s+'  # Timestamp
         r'(?P<hostname>\S+)\s+'  # Hostname
         r'(?P<tag>[^\[:]+)(?:\[(?P<procid>\d+)\])?:\s*'  # Tag and PID
-        r'(?P<message>.*)$'  # Message
+        r'(?P<message>.*)$',  # Message
+        re.ASCII
     )
     
-    # Severity levels (from syslog spec)
-    SEVERITIES = {
-        0: 'CRITICAL',  # Emergency
-        1: 'CRITICAL',  # Alert
-        2: 'CRITICAL',  # Critical
-        3: 'ERROR',     # Error
-        4: 'WARN',      # Warning
-        5: 'INFO',      # Notice
-        6: 'INFO',      # Informational
-        7: 'DEBUG'      # Debug
-    }
+    # Severity levels (from syslog spec), indexed by severity 0-7
+    SEVERITIES = (
+        'CRITICAL',  # 0 Emergency
+        'CRITICAL',  # 1 Alert
+        'CRITICAL',  # 2 Critical
+        'ERROR',     # 3 Error
+        'WARN',      # 4 Warning
+        'INFO',      # 5 Notice
+        'INFO',      # 6 Informational
+        'DEBUG'      # 7 Debug
+    )
     
-    # Facilities (for metadata)
-    FACILITIES = {
-        0: 'kern', 1: 'user', 2: 'mail', 3: 'daemon',
-        4: 'auth', 5: 'syslog', 6: 'lpr', 7: 'news',
-        8: 'uucp', 9: 'cron', 10: 'authpriv', 11: 'ftp',
-        16: 'local0', 17: 'local1', 18: 'local2', 19: 'local3',
-        20: 'local4', 21: 'local5', 22: 'local6', 23: 'local7'
-    }
+    # Facilities (for metadata), indexed by facility code 0-23
+    FACILITIES = (
+        'kern', 'user', 'mail', 'daemon',
+        'auth', 'syslog', 'lpr', 'news',
+        'uucp', 'cron', 'authpriv', 'ftp',
+        'unknown(12)', 'unknown(13)', 'unknown(14)', 'unknown(15)',
+        'local0', 'local1', 'local2', 'local3',
+        'local4', 'local5', 'local6', 'local7'
+    )
     
     def __init__(self):
         super().__init__("Syslog RFC 5424")
+        
+        # Results for repeated lines (device heartbeats)
+        self._cache = ParseCache()
     
     def can_parse(self, raw_log: str) -> bool:
         """Check if log matches syslog format"""
         # Check for syslog priority at start
-        return raw_log.strip().startswith('<') and '>' in raw_log[:10]
+        line = raw_log.lstrip()
+        return line.startswith('<') and '>' in line[:10]
     
     def parse(self, raw_log: str) -> Optional[Dict[str, Any]]:
         """
@@ -79,17 +93,25 @@ class SyslogParser(LogParser):
         Supports both RFC 5424 and RFC 3164 (legacy) formats.
         """
         try:
+            line = raw_log.strip()
+            
+            parsed = self._cache.get(line)
+            if parsed:
+                return parsed
+            
             # Try RFC 5424 first
-            match = self.RFC5424_PATTERN.match(raw_log.strip())
+            match = self.RFC5424_PATTERN.match(line)
             
             if match:
-                return self._parse_rfc5424(match)
+                split = self._split_structured(line, match.end())
+                if split:
+                    return self._cache.put(line, self._parse_rfc5424(*match.groups(), *split))
             
             # Try legacy RFC 3164
-            match = self.RFC3164_PATTERN.match(raw_log.strip())
+            match = self.RFC3164_PATTERN.match(line)
             
             if match:
-                return self._parse_rfc3164(match)
+                return self._cache.put(line, self._parse_rfc3164(match))
             
             return None
             
@@ -97,37 +119,55 @@ class SyslogParser(LogParser):
             print(f"Syslog parsing error: {e}")
             return None
     
-    def _parse_rfc5424(self, match) -> Dict[str, Any]:
-        """Parse RFC 5424 format"""
-        data = match.groupdict()
+    def _split_structured(self, line: str, pos: int) -> Optional[tuple]:
+        """
+        Split the remainder of an RFC 5424 line into structured data and message.
         
+        Args:
+            line: Syslog line
+            pos: Offset just past the header
+            
+        Returns:
+            (structured, message), or None if no structured data field is present
+        """
+        if line.startswith('-', pos):
+            return '-', line[pos + 1:]
+        
+        match = (self.STRUCTURED_PATTERN.match(line, pos) or
+                 self.LOOSE_STRUCTURED_PATTERN.match(line, pos))
+        if not match:
+            return None
+        
+        return match.group(), line[match.end():]
+    
+    def _parse_rfc5424(self, pri: str, version: str, timestamp: str, hostname: str,
+                       appname: str, procid: str, msgid: str, structured: str,
+                       message: str) -> Dict[str, Any]:
+        """Parse RFC 5424 format"""
         # Parse priority to get facility and severity
-        pri = int(data['pri'])
+        pri = int(pri)
         facility = pri // 8
         severity = pri % 8
         
-        # Parse timestamp
-        timestamp = self._parse_syslog_timestamp(data['timestamp'])
-        
         # Build metadata
         metadata = {
-            'facility': self.FACILITIES.get(facility, f'unknown({facility})'),
+            'facility': self._facility_name(facility),
             'severity': severity,
-            'version': data['version'],
-            'procid': data['procid'] if data['procid'] != '-' else None,
-            'msgid': data['msgid'] if data['msgid'] != '-' else None,
+            'version': version,
+            'procid': procid if procid != '-' else None,
+            'msgid': msgid if msgid != '-' else None,
         }
         
         # Parse structured data if present
-        if data['structured'] != '-':
-            metadata['structured_data'] = data['structured']
+        if structured != '-':
+            metadata['structured_data'] = structured
         
         return {
-            'timestamp': timestamp,
-            'level': self.SEVERITIES.get(severity, 'INFO'),
-            'source': data['hostname'] if data['hostname'] != '-' else 'unknown',
-            'application': data['appname'] if data['appname'] != '-' else 'syslog',
-            'message': data['message'].strip(),
+            'timestamp': self._parse_syslog_timestamp(timestamp),
+            'level': self.SEVERITIES[severity],
+            'source': hostname if hostname != '-' else 'unknown',
+            'application': appname if appname != '-' else 'syslog',
+            'message': message.strip(),
             'metadata': metadata
         }
     
@@ -145,26 +185,57 @@ class SyslogParser(LogParser):
         
         # Build metadata
         metadata = {
-            'facility': self.FACILITIES.get(facility, f'unknown({facility})'),
+            'facility': self._facility_name(facility),
             'severity': severity,
             'procid': data.get('procid', None),
         }
         
         return {
             'timestamp': timestamp,
-            'level': self.SEVERITIES.get(severity, 'INFO'),
+            'level': self.SEVERITIES[severity],
             'source': data['hostname'],
             'application': data['tag'],
             'message': data['message'].strip(),
             'metadata': metadata
         }
     
-    def _parse_syslog_timestamp(self, timestamp_str: str) -> str:
-        """Parse RFC 5424 timestamp (ISO 8601)"""
+    def _facility_name(self, facility: int) -> str:
+        """Map facility code to name (codes above 23 are out of spec)"""
+        return self.FACILITIES[facility] if facility < 24 else f'unknown({facility})'
+    
+    def _parse_syslog_timestamp(self, timestamp_str: str) -> Optional[str]:
+        """
+        Parse RFC 5424 timestamp (ISO 8601), None if absent or invalid.
+        
+        Format: 2025-11-11T16:00:00.000Z (fraction and offset optional)
+        
+        Fixed-width up to the seconds, so slice it directly instead of going
+        through strptime. Fraction and timezone are dropped for simplicity.
+        """
+        if timestamp_str == '-':
+            return None
+        
+        # YYYY-MM-DDTHH:MM:SS followed by nothing, 'Z', a fraction or an offset
+        head = timestamp_str[:19]
+        digits = head[0:4] + head[5:7] + head[8:10] + head[11:13] + head[14:16] + head[17:19]
+        if (len(digits) == 14 and digits.isdigit() and
+                head[4] == head[7] == '-' and head[10] == 'T' and head[13] == head[16] == ':' and
+                (timestamp_str[19:] in ('', 'Z') or timestamp_str[19] in '.+-')):
+            try:
+                dt = datetime(
+                    int(digits[0:4]),    # year
+                    int(digits[4:6]),    # month
+                    int(digits[6:8]),    # day
+                    int(digits[8:10]),   # hour
+                    int(digits[10:12]),  # minute
+                    int(digits[12:14])   # second
+                )
+                return dt.isoformat()
+            except ValueError:
+                pass
+        
         try:
-            if timestamp_str == '-':
-                return datetime.now().isoformat()
-            
+            # Unusual layout - let strptime handle it
             # Remove timezone info for simplicity (or handle properly)
             clean_ts = timestamp_str.replace('Z', '').split('+')[0].split('-', 3)[:3]
             clean_ts = '-'.join(clean_ts)
@@ -177,16 +248,27 @@ class SyslogParser(LogParser):
             
             return dt.isoformat()
         except Exception:
-            return datetime.now().isoformat()
+            return None
     
-    def _parse_legacy_timestamp(self, timestamp_str: str) -> str:
-        """Parse RFC 3164 timestamp (Nov 11 16:00:00)"""
+    def _parse_legacy_timestamp(self, timestamp_str: str) -> Optional[str]:
+        """Parse RFC 3164 timestamp (Nov 11 16:00:00), None if invalid"""
+        # Add current year since legacy format doesn't include it
+        current_year = now_iso()[:4]
+        
         try:
-            # Add current year since legacy format doesn't include it
-            current_year = datetime.now().year
+            month, day, clock = timestamp_str.split()
+            hour, minute, second = clock.split(':')
+            dt = datetime(int(current_year), MONTHS[month], int(day),
+                          int(hour), int(minute), int(second))
+            return dt.isoformat()
+        except (KeyError, ValueError):
+            pass
+        
+        try:
+            # Lower-case month names etc. - let strptime handle it
             full_timestamp = f"{timestamp_str} {current_year}"
             dt = datetime.strptime(full_timestamp, '%b %d %H:%M:%S %Y')
             return dt.isoformat()
         except Exception:
-            return datetime.now().isoformat()
+            return None
 
@@ -0,0 +1,69 @@
+"""
+Shared Redis connection pool for the sync queue clients.
+
+redis.from_url gives every client its own unbounded ConnectionPool; the
+producer and consumer in one process share this bounded one instead.
+"""
+
+import os
+import threading
+import redis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Most connections open at once per URL; callers wait up to POOL_TIMEOUT
+# seconds for a free one instead of opening more
+MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', '10'))
+POOL_TIMEOUT = 2
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def get_pool(redis_url=None):
+    """
+    Get the process-wide pool for a Redis URL, creating it on first use.
+    
+    Args:
+        redis_url: Redis connection string (default from env)
+        
+    Returns:
+        redis.BlockingConnectionPool: RESP3 pool returning raw bytes
+    """
+    redis_url = redis_url or os.getenv('REDIS_URL', 'redis://127.0.0.1:6379')
+    
+    with _lock:
+        pool = _pools.get(redis_url)
+        if pool is None:
+            pool = redis.BlockingConnectionPool.from_url(
+                redis_url,
+                max_connections=MAX_CONNECTIONS,
+                timeout=POOL_TIMEOUT,
+                decode_responses=False,
+                protocol=3  # RESP3, parsed by hiredis when installed
+            )
+            _pools[redis_url] = pool
+        return pool
+
+
+def stream_entries(reply):
+    """
+    Get the entries from an XREAD/XREADGROUP reply, in either shape.
+    
+    RESP3 replies come back as {stream: [[(id, fields), ...]]}, but
+    redis-py 8 (legacy_responses=True by default) converts them to the
+    RESP2 list [[stream, [(id, fields), ...]]].
+    
+    Args:
+        reply: XREAD/XREADGROUP reply (None or empty when nothing was read)
+        
+    Returns:
+        list: [(message_id, fields), ...] across every stream in the reply
+    """
+    if not reply:
+        return []
+    
+    if isinstance(reply, dict):
+        return [entry for entries in reply.values() for entry in entries[0]]
+    return [entry for _stream, entries in reply for entry in entries]
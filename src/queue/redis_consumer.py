@@ -4,11 +4,15 @@ Reads logs from Redis Stream and writes to PostgreSQL in batches.
 """
 
 import redis
-import json
+import asyncio
+import csv
+import io
+import orjson
+import re
 import time
-from datetime import datetime
-from sqlalchemy.orm import sessionmaker
-import os
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
 from dotenv import load_dotenv
 
 # Import from existing modules
@@ -17,12 +21,272 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from src.database import get_database_engine
-from src.api.models import Log
+from src.queue._redis_pool import get_pool, stream_entries
+from src.api.models import Log, LogSource, LogApplication
 
 load_dotenv()
 
+# Column order for COPY, with database names taken from the model
+# (the log_metadata attribute maps to the 'metadata' column)
+COPY_COLUMNS = [
+    Log.__table__.c[key].name
+    for key in ('id', 'timestamp', 'level', 'source', 'application', 'message', 'log_metadata')
+]
 
-class RedisConsumer:
+# ISO 8601 timestamps are passed to PostgreSQL as text and cast there;
+# this only checks the shape so bad rows are rejected before the insert
+_ISO_RE = re.compile(
+    r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?'
+    r'(?:Z|[+-]\d{2}(?::?\d{2})?)?\Z',
+    re.ASCII
+)
+
+# Daily partitions are created on demand for UTC days this far before /
+# after today; rows further out go to logs_default (bad clocks shouldn't
+# leave a trail of one-row partitions)
+PARTITION_PAST_DAYS = 31
+PARTITION_FUTURE_DAYS = 7
+
+# Stored logs are fanned out to the API's WebSocket listeners through a
+# second stream (read with plain XREAD, so every API worker sees all of it)
+WS_STREAM = 'logs_ws'
+WS_STREAM_MAXLEN = 100_000
+
+
+class _StreamConsumer:
+    """
+    Consumer-group state, message decoding and metrics shared by
+    RedisConsumer and AsyncRedisConsumer.
+    """
+    
+    def __init__(self, consumer_name, group_name, batch_size, stream_name):
+        self.consumer_name = consumer_name
+        self.group_name = group_name
+        self.batch_size = batch_size
+        self.stream_name = stream_name
+        
+        # IDs of the last stored batch - acked together with the next read
+        self.pending_acks = []
+        
+        # UTC days known to have a partition (None: table not partitioned)
+        self._partition_days = set()
+        
+        # COPY text buffer and its writer, reused for every batch.
+        # QUOTE_ALL so empty strings aren't read back as NULL.
+        self._copy_io = io.StringIO()
+        self._copy_writer = csv.writer(self._copy_io, quoting=csv.QUOTE_ALL, lineterminator='\n')
+        
+        # Metrics
+        self.logs_processed = 0
+        self.batches_processed = 0
+        self.errors = 0
+        self.start_time = time.time()
+    
+    def _decode_messages(self, stream_messages):
+        """
+        Turn stream entries into row dicts for the logs table.
+        
+        Args:
+            stream_messages: [(message_id, {b'level': b'INFO', ...}), ...]
+        
+        Returns:
+            tuple: (logs, message_ids) - undecodable entries are counted as
+            errors and only appear in message_ids, so they still get acked
+        """
+        logs = []
+        message_ids = []
+        iso_match = _ISO_RE.match
+        
+        for message_id, message_data in stream_messages:
+            try:
+                if b'data' in message_data:
+                    # Entry queued as a single JSON field (older producers)
+                    log = _legacy_log(message_data[b'data'])
+                else:
+                    # Log fields are stored natively; only metadata is JSON
+                    metadata = message_data.get(b'metadata')
+                    
+                    # Column values keyed like the Log model's attributes
+                    log = {
+                        'timestamp': message_data[b'timestamp'].decode(),
+                        'level': message_data[b'level'].decode(),
+                        'source': message_data[b'source'].decode(),
+                        'application': message_data[b'application'].decode(),
+                        'message': message_data[b'message'].decode(),
+                        'log_metadata': orjson.loads(metadata) if metadata is not None else None
+                    }
+                
+                if not iso_match(log['timestamp']):
+                    raise ValueError(f"Invalid timestamp: {log['timestamp']!r}")
+                
+                logs.append(log)
+                message_ids.append(message_id)
+                
+            except Exception as e:
+                print(f"Error parsing message {message_id}: {e}")
+                self.errors += 1
+                # Still acknowledge to remove from queue
+                message_ids.append(message_id)
+        
+        return logs, message_ids
+    
+    def _new_partition_days(self, logs):
+        """
+        UTC days in a batch that may still need a partition.
+        
+        Args:
+            logs: List of log dicts
+        
+        Returns:
+            list: datetime.date values within the managed window that
+            this consumer hasn't created (or found) a partition for yet
+        """
+        if self._partition_days is None:
+            return []
+        
+        today = datetime.now(timezone.utc).date()
+        first = today - timedelta(days=PARTITION_PAST_DAYS)
+        last = today + timedelta(days=PARTITION_FUTURE_DAYS)
+        
+        # The date prefix is the UTC day unless the timestamp carries a
+        # non-UTC offset - only those rows are parsed in full
+        prefixes = set()
+        days = set()
+        for log in logs:
+            ts = log['timestamp']
+            offset = ts[16:]  # after YYYY-MM-DDTHH:MM
+            if ('+' in offset or '-' in offset) and not offset.endswith('+00:00'):
+                try:
+                    days.add(datetime.fromisoformat(ts).astimezone(timezone.utc).date())
+                except ValueError:
+                    pass
+            else:
+                prefixes.add(ts[:10])
+        
+        for prefix in prefixes:
+            try:
+                days.add(date.fromisoformat(prefix))
+            except ValueError:
+                pass
+        
+        return [day for day in days - self._partition_days if first <= day <= last]
+    
+    def _partition_failed(self, error):
+        """Report a failed create_logs_partition call (the batch still goes to logs_default)"""
+        if 'create_logs_partition' in str(error) and 'does not exist' in str(error):
+            # Schema from before partitioning - nothing to manage
+            print("create_logs_partition() not found, not managing log partitions")
+            self._partition_days = None
+        else:
+            print(f"Could not create log partitions (rows go to logs_default): {error}")
+    
+    def _copy_buffer(self, ids, logs):
+        """
+        Build the CSV body for COPY ... FROM STDIN (FORMAT csv).
+        
+        Args:
+            ids: Sequence values reserved for the rows
+            logs: List of log dicts; each gets its 'id' set
+        
+        Returns:
+            io.StringIO: CSV rows in COPY_COLUMNS order, rewound (the
+            consumer's shared buffer - valid until the next batch)
+        """
+        buffer = self._copy_io
+        buffer.seek(0)
+        buffer.truncate()
+        
+        writerow = self._copy_writer.writerow
+        for log_id, log in zip(ids, logs):
+            log['id'] = log_id
+            writerow((
+                log_id,
+                log['timestamp'],
+                log['level'],
+                log['source'],
+                log['application'],
+                log['message'],
+                orjson.dumps(log['log_metadata']).decode()
+            ))
+        buffer.seek(0)
+        return buffer
+    
+    def _count_batch(self, processed):
+        """Update metrics for a stored batch and return its size"""
+        self.logs_processed += processed
+        self.batches_processed += 1
+        
+        if self.batches_processed % 10 == 0:
+            self._print_metrics()
+        
+        return processed
+    
+    def _print_metrics(self):
+        """Print processing metrics"""
+        elapsed = time.time() - self.start_time
+        if elapsed > 0:
+            rate = self.logs_processed / elapsed
+            print(f"[{self.consumer_name}] Processed {self.logs_processed} logs "
+                  f"in {self.batches_processed} batches ({rate:.0f} logs/sec, "
+                  f"{self.errors} errors)")
+    
+    def _print_final_metrics(self):
+        """Print final statistics"""
+        elapsed = time.time() - self.start_time
+        print("\n" + "=" * 60)
+        print(f"Consumer '{self.consumer_name}' Statistics:")
+        print(f"  Total logs processed: {self.logs_processed}")
+        print(f"  Total batches: {self.batches_processed}")
+        print(f"  Errors: {self.errors}")
+        print(f"  Runtime: {elapsed:.1f} seconds")
+        if elapsed > 0:
+            print(f"  Average rate: {self.logs_processed / elapsed:.0f} logs/sec")
+        print("=" * 60)
+
+
+def _legacy_log(data):
+    """
+    Row dict for an entry written as {'data': json} by older producers.
+    
+    Args:
+        data: JSON bytes with the API field names
+    
+    Returns:
+        dict: Column values keyed like the Log model's attributes
+    """
+    payload = orjson.loads(data)
+    return {
+        'timestamp': payload['timestamp'],
+        'level': payload['level'],
+        'source': payload['source'],
+        'application': payload['application'],
+        'message': payload['message'],
+        'log_metadata': payload.get('metadata')
+    }
+
+
+def _publish_payload(log):
+    """
+    Serialize a stored log for the WebSocket stream.
+    
+    Args:
+        log: Log dict with its database ID
+    
+    Returns:
+        bytes: JSON with the API field names
+    """
+    return orjson.dumps({
+        'id': log['id'],
+        'timestamp': log['timestamp'],
+        'level': log['level'],
+        'source': log['source'],
+        'application': log['application'],
+        'message': log['message'],
+        'metadata': log['log_metadata']
+    })
+
+
+class RedisConsumer(_StreamConsumer):
     """
     Consumes logs from Redis Stream and writes to PostgreSQL.
     
@@ -33,6 +297,9 @@ class RedisConsumer:
     - Error handling (failed logs go to dead letter queue)
     """
     
+    # Batches at least this big are written with COPY instead of INSERTs
+    COPY_THRESHOLD = 100
+    
     def __init__(self, consumer_name='worker-1', group_name='log-processors', 
                  batch_size=500, stream_name='logs'):
         """
@@ -44,27 +311,20 @@ class RedisConsumer:
             batch_size: How many logs to process at once (default: 500)
             stream_name: Redis stream to read from
         """
-        self.consumer_name = consumer_name
-        self.group_name = group_name
-        self.batch_size = batch_size
-        self.stream_name = stream_name
+        super().__init__(consumer_name, group_name, batch_size, stream_name)
         
-        # Connect to Redis
-        redis_url = os.getenv('REDIS_URL', 'redis://127.0.0.1:6379')
-        self.redis_client = redis.from_url(redis_url, decode_responses=False)
+        # Connect to Redis through the process-wide pool
+        # (RESP3 + hiredis C reply parser for the large XREADGROUP replies)
+        self.redis_client = redis.Redis(connection_pool=get_pool())
         
         # Ensure consumer group exists
         self._create_consumer_group()
         
-        # Connect to PostgreSQL
+        # Connect to PostgreSQL - one connection held for the consumer's
+        # lifetime instead of a pool checkout per batch. After a dropped
+        # connection SQLAlchemy reconnects it on the next begin().
         self.engine = get_database_engine()
-        self.Session = sessionmaker(bind=self.engine)
-        
-        # Metrics
-        self.logs_processed = 0
-        self.batches_processed = 0
-        self.errors = 0
-        self.start_time = time.time()
+        self.db_conn = self.engine.connect()
         
         print(f"Consumer '{consumer_name}' initialized (batch size: {batch_size})")
     
@@ -94,130 +354,196 @@ class RedisConsumer:
             int: Number of logs processed
         """
         try:
+            # Ack the previous batch and read the next one in one round trip
+            pipe = self.redis_client.pipeline(transaction=False)
+            
+            if self.pending_acks:
+                pipe.xack(self.stream_name, self.group_name, *self.pending_acks)
+            
             # Read from stream using consumer group
             # XREADGROUP blocks until messages available
-            messages = self.redis_client.xreadgroup(
+            pipe.xreadgroup(
                 self.group_name,
                 self.consumer_name,
                 {self.stream_name: '>'},  # '>' means new messages
                 count=self.batch_size,
-                block=2000  # Wait up to 2 seconds for messages (batch window)
+                block=5000  # Redis holds the read up to 5 seconds for new messages
             )
             
-            if not messages:
-                return 0  # No messages available
+            messages = pipe.execute()[-1]
+            self.pending_acks = []
             
             # Parse messages
-            stream_messages = messages[0][1]  # [(stream, [(id, data)])]
+            stream_messages = stream_entries(messages)
             
             if not stream_messages:
                 return 0
             
             # Process batch
-            logs_to_insert = []
-            message_ids = []
-            
-            for message_id, message_data in stream_messages:
-                try:
-                    # Parse JSON payload
-                    payload = json.loads(message_data[b'data'])
-                    
-                    # Create Log object
-                    log = Log(
-                        timestamp=datetime.fromisoformat(payload['timestamp']),
-                        level=payload['level'],
-                        source=payload['source'],
-                        application=payload['application'],
-                        message=payload['message'],
-                        log_metadata=payload.get('metadata')
-                    )
-                    
-                    logs_to_insert.append(log)
-                    message_ids.append(message_id)
-                    
-                except Exception as e:
-                    print(f"Error parsing message {message_id}: {e}")
-                    self.errors += 1
-                    # Still acknowledge to remove from queue
-                    message_ids.append(message_id)
+            logs_to_insert, message_ids = self._decode_messages(stream_messages)
             
             # Batch insert to PostgreSQL
             if logs_to_insert:
                 self._batch_insert(logs_to_insert)
             
-            # Acknowledge messages (remove from pending)
-            for msg_id in message_ids:
-                self.redis_client.xack(self.stream_name, self.group_name, msg_id)
-            
-            # Update metrics
-            processed = len(logs_to_insert)
-            self.logs_processed += processed
-            self.batches_processed += 1
+            # Acknowledge messages (remove from pending) with the next read.
+            # A failed insert raises above, leaving them pending.
+            self.pending_acks = message_ids
             
-            if self.batches_processed % 10 == 0:
-                self._print_metrics()
-            
-            return processed
+            return self._count_batch(len(logs_to_insert))
             
         except Exception as e:
             print(f"Error processing batch: {e}")
             self.errors += 1
+            time.sleep(0.1)  # Back off so an outage doesn't spin the loop
             return 0
     
     def _batch_insert(self, logs):
         """
         Insert multiple logs at once (much faster than one-by-one).
-        Also publishes logs to Redis pub/sub for WebSocket streaming.
+        Also publishes logs to the WebSocket stream.
         
         Args:
-            logs: List of Log objects
+            logs: List of log dicts (Log attribute names); each gets its 'id' set
         """
-        session = self.Session()
+        self._ensure_partitions(logs)
+        
         try:
-            # Use add_all to track objects
-            # This allows us to get the IDs after commit
-            session.add_all(logs)
-            
-            # Single commit for entire batch
-            session.commit()
-            
-            # Now the logs have their database-generated IDs
-            # Publish logs to Redis pub/sub for WebSocket streaming
-            self._publish_to_websocket(logs)
-            
+            if len(logs) >= self.COPY_THRESHOLD:
+                self._copy_insert(logs)
+            else:
+                self._insert_returning(logs)
         except Exception as e:
-            session.rollback()
             print(f"Error inserting batch: {e}")
             raise
-        finally:
-            session.close()
+        
+        # Now the logs have their database-generated IDs
+        # Publish logs to the WebSocket stream
+        self._publish_to_websocket(logs)
+    
+    def _ensure_partitions(self, logs):
+        """
+        Create the daily partitions a batch needs, in their own short
+        transaction so the insert doesn't hold the partition locks.
+        
+        Args:
+            logs: List of log dicts
+        """
+        days = self._new_partition_days(logs)
+        if not days:
+            return
+        
+        conn = self.db_conn
+        try:
+            with conn.begin():
+                conn.execute(
+                    text("SELECT create_logs_partition(day) FROM unnest(CAST(:days AS date[])) AS day"),
+                    {'days': days}
+                )
+        except Exception as e:
+            self._partition_failed(e)
+            return
+        self._partition_days.update(days)
+    
+    def _copy_insert(self, logs):
+        """
+        Insert a batch with a single COPY ... FROM STDIN.
+        
+        COPY skips the per-row INSERT parse/plan/execute, but can't return
+        generated keys - so the IDs are drawn from the id sequence first
+        and written explicitly.
+        
+        Args:
+            logs: List of log dicts; each gets its 'id' set
+        """
+        conn = self.db_conn
+        with conn.begin():
+            ids = conn.execute(
+                select(func.nextval(func.pg_get_serial_sequence(Log.__tablename__, 'id')))
+                .select_from(func.generate_series(1, len(logs)))
+            ).scalars().all()
+            
+            buffer = self._copy_buffer(ids, logs)
+            
+            # Raw psycopg2 cursor on the same connection (same transaction)
+            cursor = conn.connection.cursor()
+            try:
+                cursor.copy_expert(
+                    f"COPY {Log.__tablename__} ({', '.join(COPY_COLUMNS)}) "
+                    f"FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+            finally:
+                cursor.close()
+            
+            # Keep the dropdown lookup tables current (same transaction)
+            self._upsert_lookups(conn, logs)
+    
+    def _insert_returning(self, logs):
+        """
+        Insert a small batch with one multi-row INSERT ... RETURNING id.
+        
+        Core executemany instead of the ORM - no unit of work or identity
+        map, and SQLAlchemy's insertmanyvalues batches the rows into a
+        single statement.
+        
+        Args:
+            logs: List of log dicts; each gets its 'id' set
+        """
+        conn = self.db_conn
+        with conn.begin():
+            ids = conn.execute(
+                insert(Log).returning(Log.id, sort_by_parameter_order=True),
+                logs
+            ).scalars().all()
+            for log_id, log in zip(ids, logs):
+                log['id'] = log_id
+            
+            # Keep the dropdown lookup tables current (same transaction)
+            self._upsert_lookups(conn, logs)
+    
+    def _upsert_lookups(self, conn, logs):
+        """
+        Record any new sources/applications seen in this batch.
+        
+        Args:
+            conn: Open connection (committed by the caller)
+            logs: List of log dicts
+        """
+        sources = {log['source'] for log in logs}
+        applications = {log['application'] for log in logs}
+        
+        conn.execute(
+            insert(LogSource)
+            .values([{'source': s} for s in sources])
+            .on_conflict_do_nothing()
+        )
+        conn.execute(
+            insert(LogApplication)
+            .values([{'application': a} for a in applications])
+            .on_conflict_do_nothing()
+        )
     
     def _publish_to_websocket(self, logs):
         """
-        Publish logs to Redis pub/sub for WebSocket clients.
+        Append logs to the WebSocket stream for the API to broadcast.
         
         Args:
-            logs: List of Log objects with database IDs
+            logs: List of log dicts with database IDs
         """
         try:
+            # Queue every XADD and send them in one round trip
+            pipe = self.redis_client.pipeline(transaction=False)
+            
             for log in logs:
-                # Convert Log object to dict for JSON serialization
-                log_data = {
-                    'id': log.id,
-                    'timestamp': log.timestamp.isoformat() if log.timestamp else None,
-                    'level': log.level,
-                    'source': log.source,
-                    'application': log.application,
-                    'message': log.message,
-                    'metadata': log.log_metadata
-                }
-                
-                # Publish to Redis pub/sub channel
-                self.redis_client.publish('new_logs', json.dumps(log_data))
+                pipe.xadd(WS_STREAM, {'data': _publish_payload(log)},
+                          maxlen=WS_STREAM_MAXLEN, approximate=True)
+            
+            pipe.execute()
         
         except Exception as e:
-            # Don't fail the batch if pub/sub fails
-            print(f"Warning: Failed to publish to WebSocket channel: {e}")
+            # Don't fail the batch if the WebSocket feed fails
+            print(f"Warning: Failed to publish to WebSocket stream: {e}")
     
     def run(self, duration=None):
         """
@@ -235,16 +561,12 @@ class RedisConsumer:
         
         try:
             while True:
-                # Process one batch
-                processed = self.process_batch()
+                # Process one batch - an idle queue waits inside XREADGROUP
+                self.process_batch()
                 
                 # Check if we should stop
                 if duration and (time.time() - start) > duration:
                     break
-                
-                # Small sleep if no messages (reduce CPU usage)
-                if processed == 0:
-                    time.sleep(0.1)
                     
         except KeyboardInterrupt:
             print("\nStopping consumer...")
@@ -252,32 +574,212 @@ class RedisConsumer:
             self._print_final_metrics()
             self.close()
     
-    def _print_metrics(self):
-        """Print processing metrics"""
-        elapsed = time.time() - self.start_time
-        if elapsed > 0:
-            rate = self.logs_processed / elapsed
-            print(f"[{self.consumer_name}] Processed {self.logs_processed} logs "
-                  f"in {self.batches_processed} batches ({rate:.0f} logs/sec, "
-                  f"{self.errors} errors)")
-    
-    def _print_final_metrics(self):
-        """Print final statistics"""
-        elapsed = time.time() - self.start_time
-        print("\n" + "=" * 60)
-        print(f"Consumer '{self.consumer_name}' Statistics:")
-        print(f"  Total logs processed: {self.logs_processed}")
-        print(f"  Total batches: {self.batches_processed}")
-        print(f"  Errors: {self.errors}")
-        print(f"  Runtime: {elapsed:.1f} seconds")
-        if elapsed > 0:
-            print(f"  Average rate: {self.logs_processed / elapsed:.0f} logs/sec")
-        print("=" * 60)
+    def flush_acks(self):
+        """Acknowledge the last batch now instead of with the next read"""
+        if self.pending_acks:
+            self.redis_client.xack(self.stream_name, self.group_name, *self.pending_acks)
+            self.pending_acks = []
     
     def close(self):
         """Clean up connections"""
         if self.redis_client:
+            try:
+                self.flush_acks()
+            except redis.RedisError as e:
+                print(f"Warning: Failed to ack last batch: {e}")
             self.redis_client.close()
+        if self.db_conn is not None:
+            self.db_conn.close()
+            self.db_conn = None
+        self.engine.dispose()
+
+
+class AsyncRedisConsumer(_StreamConsumer):
+    """
+    asyncio counterpart of RedisConsumer, for running many consumers as
+    tasks in one process (see WorkerPool).
+    
+    The Redis client and asyncpg pool are owned by the caller and shared
+    between consumers; each consumer only keeps its name, pending acks
+    and metrics.
+    """
+    
+    def __init__(self, redis_client, db_pool, consumer_name='worker-1',
+                 group_name='log-processors', batch_size=500, stream_name='logs'):
+        """
+        Initialize consumer.
+        
+        Args:
+            redis_client: redis.asyncio client (protocol=3)
+            db_pool: asyncpg pool
+            consumer_name: Unique name for this consumer
+            group_name: Consumer group name (all workers share this)
+            batch_size: How many logs to process at once (default: 500)
+            stream_name: Redis stream to read from
+        """
+        super().__init__(consumer_name, group_name, batch_size, stream_name)
+        self.redis_client = redis_client
+        self.db_pool = db_pool
+    
+    async def create_consumer_group(self):
+        """Create consumer group if it doesn't exist"""
+        try:
+            await self.redis_client.xgroup_create(
+                self.stream_name, self.group_name, id='0', mkstream=True
+            )
+            print(f"Created consumer group '{self.group_name}'")
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+    
+    async def process_batch(self):
+        """
+        Read and process one batch of logs.
+        
+        Returns:
+            int: Number of logs processed
+        """
+        try:
+            # Ack the previous batch and read the next one in one round trip
+            pipe = self.redis_client.pipeline(transaction=False)
+            
+            if self.pending_acks:
+                pipe.xack(self.stream_name, self.group_name, *self.pending_acks)
+            
+            pipe.xreadgroup(
+                self.group_name,
+                self.consumer_name,
+                {self.stream_name: '>'},
+                count=self.batch_size,
+                block=5000
+            )
+            
+            messages = (await pipe.execute())[-1]
+            self.pending_acks = []
+            
+            stream_messages = stream_entries(messages)
+            
+            if not stream_messages:
+                return 0
+            
+            logs_to_insert, message_ids = self._decode_messages(stream_messages)
+            
+            if logs_to_insert:
+                await self._batch_insert(logs_to_insert)
+            
+            # Acked with the next read; a failed insert leaves them pending
+            self.pending_acks = message_ids
+            
+            return self._count_batch(len(logs_to_insert))
+            
+        except Exception as e:
+            print(f"Error processing batch: {e}")
+            self.errors += 1
+            await asyncio.sleep(0.1)  # Back off so an outage doesn't spin the loop
+            return 0
+    
+    async def _batch_insert(self, logs):
+        """
+        COPY a batch into logs on a pooled connection, then publish it.
+        
+        asyncpg has no insertmanyvalues, so every batch takes the COPY
+        route: IDs from the sequence, then the CSV rows.
+        
+        Args:
+            logs: List of log dicts; each gets its 'id' set
+        """
+        async with self.db_pool.acquire() as conn:
+            await self._ensure_partitions(conn, logs)
+            
+            async with conn.transaction():
+                rows = await conn.fetch(
+                    "SELECT nextval(pg_get_serial_sequence($1, 'id')) "
+                    "FROM generate_series(1, $2)",
+                    Log.__tablename__, len(logs)
+                )
+                buffer = self._copy_buffer([row[0] for row in rows], logs)
+                
+                await conn.copy_to_table(
+                    Log.__tablename__,
+                    source=io.BytesIO(buffer.getvalue().encode()),
+                    columns=COPY_COLUMNS,
+                    format='csv'
+                )
+                
+                # Keep the dropdown lookup tables current (same transaction)
+                await conn.execute(
+                    f"INSERT INTO {LogSource.__tablename__} (source) "
+                    f"SELECT unnest($1::text[]) ON CONFLICT DO NOTHING",
+                    list({log['source'] for log in logs})
+                )
+                await conn.execute(
+                    f"INSERT INTO {LogApplication.__tablename__} (application) "
+                    f"SELECT unnest($1::text[]) ON CONFLICT DO NOTHING",
+                    list({log['application'] for log in logs})
+                )
+        
+        await self._publish_to_websocket(logs)
+    
+    async def _ensure_partitions(self, conn, logs):
+        """
+        Create the daily partitions a batch needs (own transaction, so the
+        COPY doesn't hold the partition locks).
+        
+        Args:
+            conn: asyncpg connection
+            logs: List of log dicts
+        """
+        days = self._new_partition_days(logs)
+        if not days:
+            return
+        
+        try:
+            await conn.execute(
+                "SELECT create_logs_partition(day) FROM unnest($1::date[]) AS day", days
+            )
+        except Exception as e:
+            self._partition_failed(e)
+            return
+        self._partition_days.update(days)
+    
+    async def _publish_to_websocket(self, logs):
+        """
+        Append logs to the WebSocket stream for the API to broadcast.
+        
+        Args:
+            logs: List of log dicts with database IDs
+        """
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for log in logs:
+                pipe.xadd(WS_STREAM, {'data': _publish_payload(log)},
+                          maxlen=WS_STREAM_MAXLEN, approximate=True)
+            await pipe.execute()
+        except Exception as e:
+            # Don't fail the batch if the WebSocket feed fails
+            print(f"Warning: Failed to publish to WebSocket stream: {e}")
+    
+    async def run(self):
+        """Consume until cancelled, then ack the last batch"""
+        print(f"Consumer '{self.consumer_name}' starting...")
+        
+        try:
+            while True:
+                # An idle queue waits inside XREADGROUP
+                await self.process_batch()
+        finally:
+            self._print_final_metrics()
+            await self.flush_acks()
+    
+    async def flush_acks(self):
+        """Acknowledge the last batch now instead of with the next read"""
+        if self.pending_acks:
+            try:
+                await self.redis_client.xack(self.stream_name, self.group_name,
+                                             *self.pending_acks)
+                self.pending_acks = []
+            except redis.RedisError as e:
+                print(f"Warning: Failed to ack last batch: {e}")
 
 
 def main():
@@ -4,37 +4,71 @@ Writes logs to Redis Stream instantly for async processing.
 """
 
 import redis
-import json
+import orjson
 import time
+import asyncio
+import threading
 from datetime import datetime
 import os
 from dotenv import load_dotenv
 
+from src.queue._redis_pool import get_pool
+
 load_dotenv()
 
+# Most entries kept for retry while Redis is failing; beyond this the
+# oldest are dropped (and counted) instead of growing without bound
+DEAD_LETTER_MAX = 100_000
+
 
 class RedisProducer:
     """
     Writes logs to Redis Stream for async processing.
+    
+    enqueue() buffers logs and writes them as one pipeline of XADDs once
+    buffer_size logs are waiting or buffer_wait seconds have passed since
+    the first one (a timer thread covers quiet periods). Entries that
+    fail to write are kept in dead_letter_queue (up to DEAD_LETTER_MAX)
+    and retried on the next flush.
+    
+    Retention: every XADD trims the stream to about stream_maxlen entries
+    (MAXLEN ~, which Redis applies cheaply a whole node at a time). The
+    oldest entries go first even if no consumer has read them yet, so
+    keep it well above the worst expected consumer backlog.
     """
     
-    def __init__(self, redis_url=None, stream_name='logs'):
+    def __init__(self, redis_url=None, stream_name='logs', buffer_size=200, buffer_wait=0.05,
+                 stream_maxlen=1_000_000):
         """
         Initialize Redis connection.
         
         Args:
             redis_url: Redis connection string (default from env)
             stream_name: Name of Redis stream
+            buffer_size: Logs buffered by enqueue() before a flush
+            buffer_wait: Longest a buffered log waits for a flush (seconds)
+            stream_maxlen: Approximate cap on stream length (see Retention)
         """
         self.redis_url = redis_url or os.getenv('REDIS_URL', 'redis://127.0.0.1:6379')
         self.stream_name = stream_name
+        self.buffer_size = buffer_size
+        self.buffer_wait = buffer_wait
+        self.stream_maxlen = stream_maxlen
+        
+        # Stream entries waiting for the next flush
+        self._buf = []
+        self._buf_deadline = None
+        self._buf_timer = None
+        self._buf_lock = threading.Lock()
+        
+        # Entries from failed flushes, written ahead of the next batch
+        self.dead_letter_queue = []
+        self.messages_dropped = 0  # Dead letters discarded at DEAD_LETTER_MAX
         
         # Connect to Redis
         try:
-            self.redis_client = redis.from_url(
-                self.redis_url,
-                decode_responses=False 
-            )
+            # Process-wide pool, shared with a consumer in the same process
+            self.redis_client = redis.Redis(connection_pool=get_pool(self.redis_url))
 
             # Test connection
             self.redis_client.ping()
@@ -48,37 +82,131 @@ class RedisProducer:
         self.messages_sent = 0
         self.last_metric_time = time.time()
     
+    def build_fields(self, log_data):
+        """
+        Build the XADD field map for one log.
+        
+        Fields are stored natively so consumers read them without a JSON
+        parse; only the nested metadata is JSON-encoded. None values are
+        left out (Redis has no null).
+        
+        Args:
+            log_data: Dictionary with log fields
+            
+        Returns:
+            dict: Stream entry fields
+        """
+        fields = {}
+        for key, value in log_data.items():
+            if value is None:
+                continue
+            if key == 'metadata':
+                fields[key] = orjson.dumps(value)
+            elif isinstance(value, (str, bytes)):
+                fields[key] = value
+            else:
+                fields[key] = str(value)
+        return fields
+    
     def enqueue(self, log_data):
         """
-        Add log to Redis Stream.
+        Buffer a log for the Redis Stream.
+        
+        The log is written by the flush that fills the buffer, by the
+        buffer_wait timer, or by an explicit flush().
         
         Args:
             log_data: Dictionary with log fields
+        """
+        fields = self.build_fields(log_data)
+        
+        with self._buf_lock:
+            self._buf.append(fields)
+            
+            if len(self._buf) == 1:
+                self._buf_deadline = time.monotonic() + self.buffer_wait
+                self._buf_timer = threading.Timer(self.buffer_wait, self.flush)
+                self._buf_timer.daemon = True
+                self._buf_timer.start()
             
+            if len(self._buf) < self.buffer_size and time.monotonic() < self._buf_deadline:
+                return
+        
+        self.flush()
+    
+    def flush(self):
+        """
+        Write buffered logs (and earlier failed ones) in one pipeline.
+        
+        The buffer is swapped out under the lock and written outside it,
+        so enqueue() callers never wait on Redis. Only entries whose XADD
+        failed are kept for retry - the rest of a partly written pipeline
+        isn't sent twice.
+        
         Returns:
-            message_id: Redis stream message ID
+            list: Redis stream message IDs of the entries written
         """
+        with self._buf_lock:
+            batch = self.dead_letter_queue + self._buf
+            self.dead_letter_queue = []
+            self._buf = []
+            self._buf_deadline = None
+            if self._buf_timer is not None:
+                self._buf_timer.cancel()
+                self._buf_timer = None
+        
+        if not batch:
+            return []
+        
         try:
-            # Serialize to JSON
-            payload = json.dumps(log_data)
-            
-            # Add to Redis Stream
             # XADD creates stream if it doesn't exist
-            message_id = self.redis_client.xadd(
-                self.stream_name,
-                {'data': payload}
-            )
-            
-            self.messages_sent += 1
-            
-            if self.messages_sent % 1000 == 0:
-                self._print_metrics()
-            
-            return message_id
-            
+            pipe = self.redis_client.pipeline(transaction=False)
+            for fields in batch:
+                pipe.xadd(self.stream_name, fields,
+                          maxlen=self.stream_maxlen, approximate=True)
+            results = pipe.execute(raise_on_error=False)
+        
         except Exception as e:
-            print(f"Error enqueuing log: {e}")
-            raise
+            # Connection-level failure - nothing is known to be written
+            print(f"Error flushing {len(batch)} logs, kept for retry: {e}")
+            self._keep_for_retry(batch)
+            return []
+        
+        failed = [fields for fields, result in zip(batch, results) if isinstance(result, Exception)]
+        if failed:
+            print(f"Error writing {len(failed)} of {len(batch)} logs, kept for retry: "
+                  f"{next(r for r in results if isinstance(r, Exception))}")
+            self._keep_for_retry(failed)
+        
+        message_ids = [result for result in results if not isinstance(result, Exception)]
+        
+        with self._buf_lock:
+            sent_before = self.messages_sent
+            self.messages_sent += len(message_ids)
+            print_metrics = self.messages_sent // 1000 != sent_before // 1000
+        
+        if print_metrics:
+            self._print_metrics()
+        
+        return message_ids
+    
+    def _keep_for_retry(self, entries):
+        """
+        Put failed entries back at the front of the dead letter queue,
+        dropping the oldest beyond DEAD_LETTER_MAX.
+        
+        Args:
+            entries: XADD field maps that weren't written
+        """
+        with self._buf_lock:
+            queue = entries + self.dead_letter_queue
+            overflow = len(queue) - DEAD_LETTER_MAX
+            if overflow > 0:
+                del queue[:overflow]
+                self.messages_dropped += overflow
+                print(f"Dead letter queue full, dropped {overflow} logs "
+                      f"({self.messages_dropped} total)")
+            self.dead_letter_queue = queue
     
     def enqueue_batch(self, logs):
         """
@@ -95,8 +223,8 @@ class RedisProducer:
             pipe = self.redis_client.pipeline()
             
             for log_data in logs:
-                payload = json.dumps(log_data)
-                pipe.xadd(self.stream_name, {'data': payload})
+                pipe.xadd(self.stream_name, self.build_fields(log_data),
+                          maxlen=self.stream_maxlen, approximate=True)
             
             # Execute all commands at once
             results = pipe.execute()
@@ -138,11 +266,136 @@ class RedisProducer:
         self.last_metric_time = current_time
     
     def close(self):
-        """Close Redis connection"""
+        """Flush buffered logs and close Redis connection"""
         if self.redis_client:
+            self.flush()
+            if self.dead_letter_queue:
+                print(f"Warning: {len(self.dead_letter_queue)} logs could not be written")
             self.redis_client.close()
 
 
+class BatchingProducer:
+    """
+    Coalesces concurrent enqueues from the async API into pipelined XADDs.
+    
+    Each caller awaits a Future that the background flusher resolves with
+    the message ID once its batch is written. A lone log is written
+    immediately; under load, logs arriving within max_wait are sent
+    together in one round trip.
+    """
+    
+    def __init__(self, producer, max_batch=500, max_wait=0.005):
+        """
+        Initialize batching producer.
+        
+        Args:
+            producer: RedisProducer providing the URL, stream and metrics
+            max_batch: Most logs written in one pipeline
+            max_wait: Seconds to wait for more logs once a batch has started
+        """
+        self.producer = producer
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        
+        self.redis_client = None
+        self.queue = None
+        self.flush_task = None
+    
+    async def start(self):
+        """Connect async Redis client and start the flusher (call on the event loop)"""
+        import redis.asyncio as aioredis
+        
+        self.redis_client = aioredis.from_url(self.producer.redis_url, decode_responses=False,
+                                              protocol=3)
+        self.queue = asyncio.Queue()
+        self.flush_task = asyncio.create_task(self._flush_loop())
+    
+    async def enqueue(self, log_data):
+        """
+        Queue one log and wait for it to be written.
+        
+        Args:
+            log_data: Dictionary with log fields
+            
+        Returns:
+            message_id: Redis stream message ID
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((self.producer.build_fields(log_data), future))
+        return await future
+    
+    async def enqueue_many(self, logs):
+        """
+        Write a list of logs as one MULTI/EXEC transaction.
+        
+        Bypasses the coalescing queue so the logs are never split across
+        pipelines - either all of them are queued or none are.
+        
+        Args:
+            logs: List of log dictionaries
+            
+        Returns:
+            list: Redis stream message IDs, in input order
+        """
+        pipe = self.redis_client.pipeline(transaction=True)
+        for log_data in logs:
+            pipe.xadd(self.producer.stream_name, self.producer.build_fields(log_data),
+                      maxlen=self.producer.stream_maxlen, approximate=True)
+        results = await pipe.execute()
+        
+        self.producer.messages_sent += len(logs)
+        return results
+    
+    async def _flush_loop(self):
+        """Drain the queue into batches forever"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self.queue.get()]
+            
+            # Only wait for company if others are already queued
+            if not self.queue.empty():
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            
+            await self._write(batch)
+    
+    async def _write(self, batch):
+        """Write one batch and resolve its futures"""
+        try:
+            if len(batch) == 1:
+                fields, _ = batch[0]
+                results = [await self.redis_client.xadd(
+                    self.producer.stream_name, fields,
+                    maxlen=self.producer.stream_maxlen, approximate=True
+                )]
+            else:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for fields, _ in batch:
+                    pipe.xadd(self.producer.stream_name, fields,
+                              maxlen=self.producer.stream_maxlen, approximate=True)
+                results = await pipe.execute()
+            
+            self.producer.messages_sent += len(batch)
+            
+            for (_, future), message_id in zip(batch, results):
+                if not future.done():
+                    future.set_result(message_id)
+        
+        except Exception as e:
+            print(f"Error enqueuing batch: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+
 def test_producer():
     """Test the producer"""
     print("Testing Redis Producer...")
@@ -158,8 +411,9 @@ def test_producer():
         'message': 'Test message from Redis producer'
     }
     
-    message_id = producer.enqueue(test_log)
-    print(f"Enqueued log with ID: {message_id}")
+    producer.enqueue(test_log)
+    message_ids = producer.flush()
+    print(f"Enqueued log with ID: {message_ids[0] if message_ids else None}")
     
     # Check stream info
     info = producer.get_stream_info()
@@ -2,45 +2,49 @@
 Worker Pool - Parallel Log Processing
 
 Manages multiple consumer workers for high throughput.
-Scales horizontally - add more workers to process faster.
+Workers are asyncio tasks in a single process sharing one Redis client
+and one asyncpg pool - consuming is I/O-bound, so a process per worker
+only costs memory. Scale further by running more pools (on more hosts).
 """
 
-import multiprocessing
+import asyncio
+import os
 import sys
-import signal
-import time
 from pathlib import Path
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
+# uvloop (libuv event loop, fewer syscalls per read) isn't available on
+# Windows - fall back to asyncio
+try:
+    import uvloop
+    run_loop = uvloop.run
+    LOOP = "uvloop"
+except ImportError:
+    run_loop = asyncio.run
+    LOOP = "asyncio"
 
-def worker_process_func(worker_id, batch_size):
+
+async def worker_coro(worker_id, batch_size, redis_client, db_pool):
     """
-    Standalone worker process function (needed for Windows multiprocessing).
+    Run one consumer until cancelled.
     
     Args:
         worker_id: Unique ID for this worker
         batch_size: Batch size for processing
+        redis_client: Shared redis.asyncio client
+        db_pool: Shared asyncpg pool
     """
-    # Import here to ensure clean process initialization
-    from src.queue.redis_consumer import RedisConsumer
-    
-    consumer_name = f"worker-{worker_id}"
+    from src.queue.redis_consumer import AsyncRedisConsumer
     
-    try:
-        consumer = RedisConsumer(
-            consumer_name=consumer_name,
-            batch_size=batch_size
-        )
-        
-        # Run until stopped
-        consumer.run()
-        
-    except KeyboardInterrupt:
-        print(f"\n[{consumer_name}] Shutting down...")
-    except Exception as e:
-        print(f"[{consumer_name}] Error: {e}")
+    consumer = AsyncRedisConsumer(
+        redis_client,
+        db_pool,
+        consumer_name=f"worker-{worker_id}",
+        batch_size=batch_size
+    )
+    await consumer.run()
 
 
 class WorkerPool:
@@ -56,107 +60,84 @@ class WorkerPool:
         Initialize worker pool.
         
         Args:
-            num_workers: Number of parallel workers
+            num_workers: Number of concurrent workers
             batch_size: Batch size for each worker (default: 500)
         """
         self.num_workers = num_workers
         self.batch_size = batch_size
-        self.processes = []
-        self.running = False
+        self.tasks = []
         
         print(f"Initializing worker pool with {num_workers} workers")
         print(f"Batch size: {batch_size} logs per batch")
     
     def start(self):
-        """Start all worker processes"""
+        """Run all workers until Ctrl+C"""
         print("\n" + "=" * 60)
-        print("Starting Worker Pool")
+        print(f"Starting Worker Pool (event loop: {LOOP})")
         print("=" * 60)
         
-        self.running = True
-        
-        # Create worker processes
-        for i in range(self.num_workers):
-            process = multiprocessing.Process(
-                target=worker_process_func,
-                args=(i + 1, self.batch_size),
-                name=f"Worker-{i+1}"
-            )
-            process.start()
-            self.processes.append(process)
-            print(f"Started {process.name} (PID: {process.pid})")
-        
-        print("\nAll workers started. Press Ctrl+C to stop.")
-        print("-" * 60)
-        
-        # Monitor workers
         try:
-            while self.running:
-                # Check if any worker died
-                for process in self.processes:
-                    if not process.is_alive():
-                        print(f"WARNING: {process.name} died! Restarting...")
-                        self._restart_worker(process)
-                
-                time.sleep(5)  # Check every 5 seconds
-                
+            run_loop(self._run())
         except KeyboardInterrupt:
+            # The runner has already cancelled the workers and closed the pools
             print("\n\nShutting down worker pool...")
-            self.stop()
-    
-    def _restart_worker(self, dead_process):
-        """Restart a dead worker"""
-        # Remove dead process
-        self.processes.remove(dead_process)
-        
-        # Extract worker ID from name
-        worker_id = int(dead_process.name.split('-')[1])
         
-        # Start new process
-        process = multiprocessing.Process(
-            target=worker_process_func,
-            args=(worker_id, self.batch_size),
-            name=dead_process.name
+        print("All workers stopped.")
+        print("=" * 60)
+    
+    async def _run(self):
+        """Open the shared connections and run the worker tasks"""
+        import asyncpg
+        import redis.asyncio as aioredis
+        from src.database import get_asyncpg_dsn
+        from src.queue.redis_consumer import AsyncRedisConsumer
+        
+        redis_url = os.getenv('REDIS_URL', 'redis://127.0.0.1:6379')
+        redis_client = aioredis.from_url(redis_url, decode_responses=False, protocol=3)
+        db_pool = await asyncpg.create_pool(
+            get_asyncpg_dsn(),
+            min_size=self.num_workers,
+            max_size=self.num_workers
         )
-        process.start()
-        self.processes.append(process)
-        print(f"Restarted {process.name} (PID: {process.pid})")
+        
+        try:
+            # Ensure consumer group exists
+            await AsyncRedisConsumer(redis_client, db_pool).create_consumer_group()
+            
+            self.tasks = [
+                asyncio.create_task(
+                    worker_coro(i + 1, self.batch_size, redis_client, db_pool),
+                    name=f"Worker-{i+1}"
+                )
+                for i in range(self.num_workers)
+            ]
+            
+            print(f"\nAll {self.num_workers} workers started. Press Ctrl+C to stop.")
+            print("-" * 60)
+            
+            await asyncio.gather(*self.tasks)
+        finally:
+            await db_pool.close()
+            await redis_client.aclose()
     
     def stop(self):
-        """Stop all workers gracefully"""
-        self.running = False
-        
+        """Cancel all workers (call from the pool's event loop)"""
         print("Stopping all workers...")
-        
-        # Send termination signal to all processes
-        for process in self.processes:
-            if process.is_alive():
-                print(f"Stopping {process.name}...")
-                process.terminate()
-        
-        # Wait for all to finish (with timeout)
-        for process in self.processes:
-            process.join(timeout=5)
-            if process.is_alive():
-                print(f"Force killing {process.name}...")
-                process.kill()
-        
-        print("All workers stopped.")
-        print("=" * 60)
+        for task in self.tasks:
+            task.cancel()
     
     def get_status(self):
         """Get status of all workers"""
         status = {
             'total_workers': self.num_workers,
-            'running_workers': sum(1 for p in self.processes if p.is_alive()),
+            'running_workers': sum(1 for t in self.tasks if not t.done()),
             'workers': []
         }
         
-        for process in self.processes:
+        for task in self.tasks:
             status['workers'].append({
-                'name': process.name,
-                'pid': process.pid,
-                'alive': process.is_alive()
+                'name': task.get_name(),
+                'alive': not task.done()
             })
         
         return status
@@ -168,7 +149,7 @@ def main():
     
     parser = argparse.ArgumentParser(description='Log Processing Worker Pool')
     parser.add_argument('--workers', type=int, default=3,
-                        help='Number of worker processes (default: 3)')
+                        help='Number of concurrent workers (default: 3)')
     parser.add_argument('--batch-size', type=int, default=500,
                         help='Batch size for each worker (default: 500)')
     
@@ -184,7 +165,4 @@ def main():
 
 
 if __name__ == "__main__":
-    # Required for Windows multiprocessing
-    multiprocessing.freeze_support()
     main()
-
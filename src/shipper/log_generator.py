@@ -7,7 +7,6 @@ Writes logs in a standard format that the shipper can parse.
 
 import random
 import time
-from datetime import datetime, timezone
 from pathlib import Path
 
 
@@ -55,18 +54,58 @@ class LogGenerator:
                 'Validating input parameters'
             ]
         }
+        
+        # (level, message) pairs weighted so one choices() draw matches
+        # picking a level, then one of its messages
+        self.level_messages = [(level.encode(), message.encode()) for level in self.levels
+                               for message in self.messages[level]]
+        self.level_message_weights = [1 / (len(self.levels) * len(self.messages[level]))
+                                      for level in self.levels
+                                      for _ in self.messages[level]]
+        
+        # Fields pre-encoded - lines are built and written as bytes
+        self.source_bytes = [source.encode() for source in self.sources]
+        self.application_bytes = [app.encode() for app in self.applications]
+        
+        # "YYYY-MM-DDTHH:MM:SS" for the current second
+        self._ts_second = None
+        self._ts_prefix = b''
+    
+    def _timestamp(self):
+        """UTC ISO 8601 timestamp with microseconds, as bytes"""
+        seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+        if seconds != self._ts_second:
+            self._ts_second = seconds
+            self._ts_prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds)).encode()
+        return b"%b.%06dZ" % (self._ts_prefix, nanos // 1000)
     
     def generate_log_line(self):
         """Generate a single log line in standard format"""
-        timestamp = datetime.now(timezone.utc).isoformat()
-        level = random.choice(self.levels)
-        source = random.choice(self.sources)
-        application = random.choice(self.applications)
-        message = random.choice(self.messages[level])
+        return self.generate_log_lines(1)[0][:-1].decode()
+    
+    def generate_log_lines(self, count):
+        """
+        Generate many log lines at once
+        
+        Draws every random field for the whole batch with one
+        random.choices call each instead of four random.choice per line.
+        
+        Args:
+            count: Number of lines
+        
+        Returns:
+            list: Encoded log lines, each ending in a newline
+        """
+        pairs = random.choices(self.level_messages, self.level_message_weights, k=count)
+        sources = random.choices(self.source_bytes, k=count)
+        applications = random.choices(self.application_bytes, k=count)
+        timestamp = self._timestamp
         
         # Format: TIMESTAMP [LEVEL] source:application - message
-        log_line = f"{timestamp} [{level}] {source}:{application} - {message}"
-        return log_line
+        return [
+            b"%b [%b] %b:%b - %b\n" % (timestamp(), level, source, application, message)
+            for (level, message), source, application in zip(pairs, sources, applications)
+        ]
     
     def generate_logs(self, count=10, interval=1):
         """
@@ -80,16 +119,23 @@ class LogGenerator:
         print(f"Interval: {interval}s between logs")
         print("-" * 60)
         
-        with open(self.output_file, 'a') as f: 
-            for i in range(count):
-                log_line = self.generate_log_line()
-                f.write(log_line + '\n')
-                f.flush()  #
-                
-                print(f"[{i+1}/{count}] {log_line}")
-                
-                if interval > 0 and i < count - 1:
-                    time.sleep(interval)
+        with open(self.output_file, 'ab', buffering=1 << 20) as f:
+            if interval <= 0:
+                # Instant batch - one write, no per-line flush or print
+                lines = self.generate_log_lines(count)
+                f.write(b''.join(lines))
+                if lines:
+                    print(f"[{count}/{count}] {lines[-1][:-1].decode()}")
+            else:
+                for i in range(count):
+                    log_line = self.generate_log_lines(1)[0]
+                    f.write(log_line)
+                    f.flush()  # Let the shipper see each line as it's written
+                    
+                    print(f"[{i+1}/{count}] {log_line[:-1].decode()}")
+                    
+                    if i < count - 1:
+                        time.sleep(interval)
         
         print("-" * 60)
         print(f"Generated {count} logs in {self.output_file}")
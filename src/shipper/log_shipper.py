@@ -5,57 +5,190 @@ Monitors log files and ships entries to the Flask API.
 Tracks file position to avoid re-sending logs on restart.
 """
 
+import gzip
+import os
 import re
+import select
 import time
 import requests
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime
+
+# orjson encodes straight to UTF-8 bytes in C; the shipper may run on
+# hosts without it, so fall back to the stdlib encoder
+try:
+    import orjson
+    json_dumps = orjson.dumps
+except ImportError:
+    import json
+    
+    def json_dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode()
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# zstd is optional (pip install zstandard); gzip is always available
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# inotify flags (linux/inotify.h)
+IN_MODIFY = 0x2
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# How long to sleep between reads where inotify isn't available
+POLL_INTERVAL = 0.1
+
+# Position file record: the offset as ASCII digits, space-padded to a
+# fixed width so each save overwrites the previous one in place
+POSITION_WIDTH = 20
+
+# Most logs the API accepts in one POST /logs/batch (MAX_BATCH_LOGS)
+MAX_BATCH_SIZE = 1000
+
+# Levels the API accepts (VALID_LEVELS in src/api/schemas.py); lines with
+# any other level are left unparsed rather than sent to be rejected
+VALID_LEVELS = frozenset({b'DEBUG', b'INFO', b'WARN', b'WARNING', b'ERROR', b'CRITICAL', b'FATAL'})
+
+# Largest the spool of unsent batches may grow before batches are dropped
+SPOOL_MAX_BYTES = 64 * 1024 * 1024
+
+# Seconds between progress lines (printing per batch costs a write each)
+PROGRESS_INTERVAL = 10.0
+
+
+def _watch_file(path):
+    """
+    Open an inotify fd that becomes readable whenever path is written
+    
+    Args:
+        path: File to watch
+        
+    Returns:
+        The inotify fd, or None if inotify isn't available (non-Linux)
+    """
+    if not sys.platform.startswith('linux'):
+        return None
+    
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, os.fsencode(path), IN_MODIFY) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+# Regex to parse log lines, compiled once for all shippers
+# Format: TIMESTAMP [LEVEL] source:application - message
+# Bytes + MULTILINE so finditer sweeps a whole read buffer; each
+# match is one complete line (surrounding whitespace excluded).
+# The timestamp must be ISO 8601 shaped - checked in the same sweep
+_LOG_PATTERN = re.compile(
+    rb'^[ \t]*(?P<timestamp>'                 # ISO 8601 timestamp
+    rb'\d{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12]\d|3[01])'
+    rb'T(?:[01]\d|2[0-3]):[0-5]\d(?::[0-5]\d(?:\.\d+)?)?'
+    rb'(?:Z|[+-]\d{2}(?::?\d{2})?)?)[ \t]+'
+    rb'\[(?P<level>\w+)\][ \t]+'             # [LEVEL]
+    rb'(?P<source>[\w-]+):'                  # source:
+    rb'(?P<application>[\w-]+)[ \t]+-[ \t]+' # application -
+    rb'(?P<message>[^\n]*\S)[^\S\n]*$',       # message (rest of line)
+    re.MULTILINE
+)
 
 
 class LogShipper:
     """Ships log entries from a file to the API"""
     
     def __init__(self, log_file, api_url='http://127.0.0.1:5000/logs', 
-                 batch_size=50, batch_timeout=5.0, position_save_interval=100):
+                 batch_size=50, batch_timeout=5.0, position_save_interval=100,
+                 max_in_flight=3, compression='gzip'):
         self.log_file = Path(log_file)
         self.api_url = api_url
+        self.batch_api_url = api_url.rstrip('/') + '/batch'  # POST /logs/batch
         self.position_file = Path(f"{log_file}.position")  # Track where we left off
+        self._position_fd = None  # Kept open across saves (opened on first save)
+        self.spool_file = Path(f"{log_file}.spool")  # Batches the API never accepted
+        
+        # Shared by every parsed log - treat as read-only
+        self._meta = {'shipper': 'python-log-shipper', 'file': str(self.log_file)}
         
         # Performance tuning parameters
-        self.batch_size = batch_size  # Send logs in batches of this size
+        # Send logs in batches of this size (the API rejects bigger ones)
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
         self.batch_timeout = batch_timeout  # Max seconds to wait before sending partial batch
         self.position_save_interval = position_save_interval  # Save position every N logs
+        self.max_in_flight = max_in_flight  # Batches POSTed concurrently while parsing continues
+        
+        # Batch bodies are repetitive JSON - level 1 shrinks them several
+        # times over at close to memcpy speed
+        self.compression = compression
+        if compression == 'zstd':
+            if zstandard is None:
+                raise ValueError("compression='zstd' requires the zstandard package")
+            self._compress = zstandard.ZstdCompressor(level=1).compress
+        elif compression == 'gzip':
+            self._compress = lambda body: gzip.compress(body, compresslevel=1)
+        elif compression is None:
+            self._compress = None
+        else:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.post_headers = dict(JSON_HEADERS)
+        if compression:
+            self.post_headers['Content-Encoding'] = compression
         
         # Batching state
-        self.batch = []  # Current batch of logs to send
-        self.last_batch_time = time.time()  # When we last sent a batch
+        # Current batch, encoded as it grows: a JSON array missing its ']'
+        self.batch_buf = bytearray(b'[')
+        self.batch_count = 0
+        self.last_batch_time = time.monotonic()  # When we last sent a batch
         self.last_position_save = 0  # Track when we last saved position
+        self.saved_position = 0  # Highest position written (saves never go back)
+        self.queued_position = 0  # Just past the last line handed to a batch
+        self.last_progress_time = time.monotonic()  # When we last printed progress
+        self.last_progress_batches = 0  # batches_sent at that point
         
         # HTTP Session with connection pooling - reuses TCP connections
         self.session = requests.Session()
+        # Connection errors and 5xx are retried with exponential backoff
+        # (0.2s, 0.4s, 0.8s...) on the pooled connection; batches that
+        # still fail are spooled to disk
+        retry = requests.adapters.Retry(
+            total=5,
+            backoff_factor=0.2,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset({'POST'}),
+            raise_on_status=False
+        )
         adapter = requests.adapters.HTTPAdapter(
             pool_connections=10,
             pool_maxsize=20,
-            max_retries=3
+            max_retries=retry
         )
         self.session.mount('http://', adapter)
         self.session.mount('https://', adapter)
         
-        # Regex to parse log lines
-        # Format: TIMESTAMP [LEVEL] source:application - message
-        self.log_pattern = re.compile(
-            r'(?P<timestamp>\S+)\s+'           # Timestamp (no spaces)
-            r'\[(?P<level>\w+)\]\s+'           # [LEVEL]
-            r'(?P<source>[\w-]+):'              # source:
-            r'(?P<application>[\w-]+)\s+-\s+'  # application -
-            r'(?P<message>.+)'                  # message (rest of line)
-        )
+        # Batches are POSTed from these threads so parsing never waits on
+        # the network; (future, size, position) per batch, oldest first
+        self.sender = ThreadPoolExecutor(max_workers=max_in_flight,
+                                         thread_name_prefix='shipper-post')
+        self.in_flight = deque()
         
         self.stats = {
             'lines_processed': 0,
+            'lines_unparsed': 0,
             'lines_sent': 0,
             'lines_failed': 0,
+            'lines_spooled': 0,
             'batches_sent': 0,
             'position_saves': 0
         }
@@ -70,33 +203,33 @@ class LogShipper:
         Returns:
             dict with parsed fields, or None if parsing fails
         """
-        match = self.log_pattern.match(line.strip())
+        match = _LOG_PATTERN.match(line.encode())
         
-        if not match:
-            print(f"Failed to parse: {line[:50]}...")
+        if not match or match['level'].upper() not in VALID_LEVELS:
+            self.stats['lines_unparsed'] += 1
             return None
         
-        data = match.groupdict()
+        return self._log_from_match(match)
+    
+    def _log_from_match(self, match):
+        """
+        Build the API payload from a _LOG_PATTERN match
         
-        # Convert timestamp to ISO format if needed
-        # Our generator already creates ISO format, but handle edge cases
-        try:
-            # Validate timestamp can be parsed
-            datetime.fromisoformat(data['timestamp'].replace('Z', '+00:00'))
-        except ValueError:
-            print(f"Invalid timestamp: {data['timestamp']}")
-            return None
+        Args:
+            match: Match over the raw bytes
+            
+        Returns:
+            dict with parsed fields
+        """
+        timestamp, level, source, application, message = match.groups()
         
         return {
-            'timestamp': data['timestamp'],
-            'level': data['level'],
-            'source': data['source'],
-            'application': data['application'],
-            'message': data['message'],
-            'metadata': {
-                'shipper': 'python-log-shipper',
-                'file': str(self.log_file)
-            }
+            'timestamp': timestamp.decode('ascii'),
+            'level': level.decode('ascii'),
+            'source': source.decode('ascii'),
+            'application': application.decode('ascii'),
+            'message': message.decode('utf-8', 'replace'),
+            'metadata': self._meta
         }
     
     def add_to_batch(self, log_data):
@@ -106,7 +239,10 @@ class LogShipper:
         Args:
             log_data: Parsed log dictionary
         """
-        self.batch.append(log_data)
+        if self.batch_count:
+            self.batch_buf += b','
+        self.batch_buf += json_dumps(log_data)
+        self.batch_count += 1
     
     def should_flush_batch(self):
         """
@@ -115,73 +251,193 @@ class LogShipper:
         Returns:
             True if batch size reached or timeout expired
         """
-        if len(self.batch) == 0:
+        if self.batch_count == 0:
             return False
         
         # Flush if batch is full
-        if len(self.batch) >= self.batch_size:
+        if self.batch_count >= self.batch_size:
             return True
         
         # Flush if timeout expired
-        if time.time() - self.last_batch_time >= self.batch_timeout:
+        if time.monotonic() - self.last_batch_time >= self.batch_timeout:
             return True
         
         return False
     
-    def flush_batch(self):
+    def flush_batch(self, position=None):
         """
         Send current batch to API endpoint
         
-        Sends individual logs to /logs endpoint (which queues them in Redis).
-        Redis workers will batch them for database insertion.
+        Posts the whole batch as one JSON array to /logs/batch (which
+        queues the logs in Redis). Redis workers batch them for database
+        insertion. The POST runs in the background; once max_in_flight
+        batches are outstanding this waits for the oldest to finish.
         
-        Returns:
-            True if successful, False otherwise
+        Args:
+            position: File position just past the batch's last line,
+                saved once the batch has been sent
         """
-        if len(self.batch) == 0:
-            return True
+        if self.batch_count == 0:
+            return
         
-        batch_size = len(self.batch)
-        success_count = 0
+        self.batch_buf += b']'
+        body = bytes(self.batch_buf)
+        # Encoded here - the zstd context isn't safe to share across senders
+        future = self.sender.submit(self._post_batch, self._encode(body))
+        # The plain body is kept in case the batch has to be spooled
+        self.in_flight.append((future, self.batch_count, position, body))
         
+        # Clear batch and reset timer
+        self.batch_buf = bytearray(b'[')
+        self.batch_count = 0
+        self.last_batch_time = time.monotonic()
+        
+        self.collect_sent(wait=len(self.in_flight) >= self.max_in_flight)
+    
+    def _encode(self, body):
+        """Compress a batch body per self.compression"""
+        return self._compress(body) if self._compress else body
+    
+    def _post_batch(self, body):
+        """
+        POST one encoded batch (runs on a sender thread)
+        
+        Args:
+            body: JSON array of logs (compressed per self.compression)
+            
+        Returns:
+            (status, rejected): HTTP status code (202 = accepted, None if no
+            response) and how many logs the API rejected as invalid
+        """
         try:
-            # Send each log individually to /logs endpoint
-            # The API will queue them in Redis, and workers will batch insert
-            for log_data in self.batch:
-                try:
-                    response = self.session.post(
-                        self.api_url,
-                        json=log_data,
-                        timeout=5
-                    )
-                    
-                    if response.status_code == 202:  # Accepted (queued)
-                        success_count += 1
-                    else:
-                        print(f"API Error {response.status_code}: {response.text[:100]}")
-                        
-                except Exception as e:
-                    print(f"Request failed: {e}")
+            response = self.session.post(
+                self.batch_api_url,
+                data=body,
+                headers=self.post_headers,
+                timeout=10
+            )
+            
+            if response.status_code != 202:  # 202 Accepted (queued)
+                print(f"API Error {response.status_code}: {response.text[:100]}")
+                return response.status_code, 0
+            
+            # Invalid logs are skipped individually; the rest were queued.
+            # The batch is in either way, so an unreadable body isn't a failure
+            try:
+                rejected = len(response.json().get('rejected', ()))
+            except ValueError:
+                rejected = 0
+            if rejected:
+                print(f"API rejected {rejected} invalid logs in batch")
+            return response.status_code, rejected
+                
+        except Exception as e:
+            print(f"Request failed: {e}")
+            return None, 0
+    
+    def collect_sent(self, wait=False):
+        """
+        Record finished batches, oldest first, and save their positions
+        
+        Batches that failed with no response or a 5xx (after retries) are
+        spooled, so their position is still saved. Logs the API rejects
+        are validated one by one, so only those are counted as failed; a
+        batch rejected outright (4xx) would fail again and is dropped.
+        
+        Args:
+            wait: If True, block until the oldest batch finishes
+                (and then collect any others already done)
+        """
+        while self.in_flight and (wait or self.in_flight[0][0].done()):
+            future, batch_size, position, body = self.in_flight.popleft()
+            wait = False
             
             # Update stats
-            self.stats['lines_sent'] += success_count
-            self.stats['lines_failed'] += (batch_size - success_count)
+            status, rejected = future.result()
+            if status == 202:
+                self.stats['lines_sent'] += batch_size - rejected
+                self.stats['lines_failed'] += rejected
+            elif (status is None or status >= 500) and self.spool_batch(body):
+                self.stats['lines_spooled'] += batch_size
+            else:
+                self.stats['lines_failed'] += batch_size
             self.stats['batches_sent'] += 1
             
-            print(f"✓ Sent batch: {success_count}/{batch_size} logs (Total: {self.stats['lines_sent']})")
+            if position is not None:
+                self.save_position(position)
+        
+        self.print_progress()
+    
+    def spool_batch(self, body):
+        """
+        Append an unsent batch to the spool file (replayed on next start)
+        
+        Args:
+            body: JSON array of logs (one line - orjson escapes newlines)
+            
+        Returns:
+            True if spooled, False if the spool is full or unwritable
+        """
+        try:
+            size = self.spool_file.stat().st_size if self.spool_file.exists() else 0
+            if size + len(body) + 1 > SPOOL_MAX_BYTES:
+                print(f"Spool full ({size} bytes) - dropping batch")
+                return False
             
-            # Clear batch and reset timer
-            self.batch = []
-            self.last_batch_time = time.time()
+            with open(self.spool_file, 'ab') as f:
+                f.write(body + b'\n')
+            return True
             
-            return success_count > 0
-                
-        except Exception as e:
-            print(f"Unexpected error: {e}")
-            self.stats['lines_failed'] += len(self.batch)
-            self.batch = []
+        except OSError as e:
+            print(f"Spool write failed: {e}")
             return False
     
+    def replay_spool(self):
+        """
+        Re-send batches spooled by an earlier run, oldest first
+        
+        Stops at the first batch the API still can't take (no response or
+        5xx); it and the batches after it stay in the spool. Batches the
+        API rejects (4xx) are dropped.
+        """
+        if not self.spool_file.exists():
+            return
+        
+        batches = self.spool_file.read_bytes().splitlines()
+        done = 0
+        for body in batches:
+            status, _ = self._post_batch(self._encode(body))
+            if status is None or status >= 500:
+                break
+            done += 1
+        
+        print(f"Replayed {done}/{len(batches)} spooled batches")
+        
+        if done == len(batches):
+            self.spool_file.unlink()
+        elif done:
+            self.spool_file.write_bytes(b'\n'.join(batches[done:]) + b'\n')
+    
+    def print_progress(self, force=False):
+        """
+        Print a progress line, at most once per PROGRESS_INTERVAL
+        
+        Args:
+            force: If True, print now (if anything was sent since the last line)
+        """
+        if self.stats['batches_sent'] == self.last_progress_batches:
+            return
+        
+        now = time.monotonic()
+        if not force and now - self.last_progress_time < PROGRESS_INTERVAL:
+            return
+        
+        print(f"✓ Sent {self.stats['lines_sent']} logs in {self.stats['batches_sent']} batches "
+              f"({self.stats['lines_spooled']} spooled, {self.stats['lines_failed']} failed, "
+              f"{self.stats['lines_unparsed']} unparsed)")
+        self.last_progress_time = now
+        self.last_progress_batches = self.stats['batches_sent']
+    
     def get_last_position(self):
         """Read last file position from position file"""
         if self.position_file.exists():
@@ -189,6 +445,7 @@ class LogShipper:
                 with open(self.position_file, 'r') as f:
                     position = int(f.read().strip())
                     print(f"Resuming from position: {position}")
+                    self.saved_position = position
                     return position
             except:
                 pass
@@ -198,17 +455,98 @@ class LogShipper:
         """
         Save current file position (periodically, not every line)
         
+        Never moves the saved position backwards - a lower position is
+        replaced by the highest one saved so far.
+        
         Args:
             position: File position to save
             force: If True, save immediately regardless of interval
         """
+        position = max(position, self.saved_position)
+        
         # Only save if enough logs have been processed OR force=True
         if force or (self.stats['lines_processed'] - self.last_position_save >= self.position_save_interval):
-            with open(self.position_file, 'w') as f:
-                f.write(str(position))
+            if self._position_fd is None:
+                self._position_fd = os.open(self.position_file, os.O_WRONLY | os.O_CREAT, 0o644)
+            
+            # One write at offset 0 instead of open/write/close per save
+            record = str(position).encode().ljust(POSITION_WIDTH)
+            if hasattr(os, 'pwrite'):
+                os.pwrite(self._position_fd, record, 0)
+            else:
+                os.lseek(self._position_fd, 0, os.SEEK_SET)
+                os.write(self._position_fd, record)
+            
+            # Only forced saves (shutdown) wait for the disk
+            if force:
+                getattr(os, 'fdatasync', os.fsync)(self._position_fd)
+            
+            self.saved_position = position
             self.last_position_save = self.stats['lines_processed']
             self.stats['position_saves'] += 1
     
+    def _process_lines(self, buf, end, base):
+        """
+        Parse and batch the complete lines in buf[:end]
+        
+        Args:
+            buf: Raw bytes read from the log file
+            end: Offset just past the last newline in buf
+            base: File position of buf[0]
+        """
+        lines = buf.count(b'\n', 0, end)
+        matched = 0
+        self.stats['lines_processed'] += lines
+        
+        for match in _LOG_PATTERN.finditer(buf, 0, end):
+            if match['level'].upper() not in VALID_LEVELS:
+                continue
+            matched += 1
+            # Add to batch instead of sending immediately
+            self.add_to_batch(self._log_from_match(match))
+            # Set after the add - if interrupted in between, the line is
+            # shipped again on restart rather than lost
+            self.queued_position = base + match.end() + 1
+            
+            # Size check only - the clock is read once per block below
+            if self.batch_count >= self.batch_size:
+                # Position just past this line is saved once the batch is sent
+                self.flush_batch(self.queued_position)
+        
+        # Unparsed lines after the last match are done with too
+        self.queued_position = base + end
+        
+        # Time out a partial batch even if the file never goes idle
+        if self.should_flush_batch():
+            self.flush_batch(base + end)
+        
+        # Count non-matching lines (reported with the progress line)
+        self.stats['lines_unparsed'] += lines - matched
+    
+    def _wait_for_data(self, watch_fd):
+        """
+        Block until the log file is written or the pending batch is due
+        
+        Args:
+            watch_fd: inotify fd from _watch_file, or None to poll
+        """
+        if watch_fd is None:
+            time.sleep(POLL_INTERVAL)
+            return
+        
+        # Wake in time to flush a partial batch; otherwise wait for writes
+        timeout = None
+        if self.batch_count:
+            timeout = max(self.batch_timeout - (time.monotonic() - self.last_batch_time), 0)
+        
+        readable, _, _ = select.select([watch_fd], [], [], timeout)
+        if readable:
+            # Only the wakeup matters - discard the queued events
+            try:
+                os.read(watch_fd, 4096)
+            except BlockingIOError:
+                pass
+    
     def tail_file(self):
         """
         Tail the log file and process new lines
@@ -223,71 +561,91 @@ class LogShipper:
         print(f"Batch size: {self.batch_size} logs")
         print(f"Batch timeout: {self.batch_timeout}s")
         print(f"Position save interval: {self.position_save_interval} logs")
+        print(f"Max in-flight batches: {self.max_in_flight}")
+        print(f"Compression: {self.compression or 'none'}")
         print(f"Press Ctrl+C to stop")
         print("-" * 60)
         
+        # Send whatever an earlier run couldn't before the new lines
+        self.replay_spool()
+        
         # Start from last known position
-        last_position = self.get_last_position()
+        position = self.get_last_position()
+        self.queued_position = position
         
-        with open(self.log_file, 'r') as f:
+        with open(self.log_file, 'rb', buffering=1 << 20) as f:
             # Seek to last position
-            f.seek(last_position)
+            f.seek(position)
+            
+            # Bytes read past `position` - at most a partial last line
+            # between reads, which waits until its newline arrives
+            buf = bytearray()
+            
+            # Wake on writes instead of polling (falls back to sleeping)
+            watch_fd = _watch_file(self.log_file)
+            print(f"Waiting on: {'inotify' if watch_fd is not None else 'polling'}")
             
             try:
                 while True:
-                    # Read new line
-                    line = f.readline()
+                    chunk = f.read(65536)
                     
-                    if line:
-                        # New content available
-                        self.stats['lines_processed'] += 1
-                        
-                        # Parse the line
-                        log_data = self.parse_log_line(line)
-                        
-                        if log_data:
-                            # Add to batch instead of sending immediately
-                            self.add_to_batch(log_data)
-                        
-                        # Get current position
-                        current_position = f.tell()
-                        
-                        # Check if we should flush the batch
-                        if self.should_flush_batch():
-                            self.flush_batch()
-                            # Save position after successful batch send
-                            self.save_position(current_position)
+                    if chunk:
+                        # New content available - process the complete lines
+                        buf += chunk
+                        end = buf.rfind(b'\n') + 1
+                        if end:
+                            self._process_lines(buf, end, position)
+                            position += end
+                            del buf[:end]
                     
                     else:
                         # No new content
                         # Check if we should flush partial batch due to timeout
                         if self.should_flush_batch():
-                            current_position = f.tell()
-                            self.flush_batch()
-                            self.save_position(current_position)
+                            self.flush_batch(position)
                         
-                        # Wait a bit before checking again
-                        time.sleep(0.1)  # Reduced from 0.5s for better responsiveness
+                        # Idle anyway - finish outstanding sends and report them
+                        while self.in_flight:
+                            self.collect_sent(wait=True)
+                        self.print_progress(force=True)
+                        
+                        # Wait for the file to grow (or the batch to time out)
+                        self._wait_for_data(watch_fd)
                         
             except KeyboardInterrupt:
                 print("\n" + "-" * 60)
                 print("Shutting down...")
                 
-                # Flush any remaining logs in batch
-                if len(self.batch) > 0:
-                    print(f"Flushing final batch of {len(self.batch)} logs...")
-                    self.flush_batch()
+                # Flush any remaining logs in batch. Ctrl+C can land
+                # mid-block, so this uses the position of the last queued
+                # line, not `position` (the start of the block)
+                if self.batch_count > 0:
+                    print(f"Flushing final batch of {self.batch_count} logs...")
+                    self.flush_batch(self.queued_position)
+                
+                # Wait for outstanding sends
+                while self.in_flight:
+                    self.collect_sent(wait=True)
                 
-                # Save final position
-                current_position = f.tell()
-                self.save_position(current_position, force=True)
+                # Save final position - everything queued has been sent or spooled
+                self.save_position(self.queued_position, force=True)
                 
                 print(f"Stats: {self.stats['lines_sent']} sent, "
+                      f"{self.stats['lines_spooled']} spooled, "
                       f"{self.stats['lines_failed']} failed, "
+                      f"{self.stats['lines_unparsed']} unparsed, "
                       f"{self.stats['lines_processed']} total")
                 print(f"Batches sent: {self.stats['batches_sent']}, "
                       f"Position saves: {self.stats['position_saves']}")
                 print("Shipper stopped")
+            
+            finally:
+                if watch_fd is not None:
+                    os.close(watch_fd)
+                if self._position_fd is not None:
+                    os.close(self._position_fd)
+                    self._position_fd = None
+                self.sender.shutdown()
 
 
 def main():
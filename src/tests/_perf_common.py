@@ -0,0 +1,440 @@
+"""
+Shared load-test helpers for the Redis ingestion tests.
+
+test_redis_simple.py, test_redis_concurrent.py and
+test_redis_performance.py are thin drivers around run() - log
+generation, sending, timing and reporting live here once.
+"""
+
+import json
+import os
+import platform
+import socket
+import time
+import urllib3
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import repeat
+from datetime import datetime, timedelta, timezone
+
+
+# API under test (scheme://host:port)
+API_URL = os.getenv('API_URL', 'http://127.0.0.1:5000')
+
+# One keep-alive connection pool for API_URL, shared by every endpoint
+# and run. urllib3 directly: requests' per-call request preparation is
+# client CPU that would otherwise cap the request rate being measured
+POOL = urllib3.connection_from_url(API_URL, maxsize=100, block=True, retries=False)
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Untimed requests sent first - fill the keep-alive pool and warm the
+# server's hot path so cold-start outliers don't land in max/P99
+WARMUP_REQUESTS = 50
+
+# Print a progress line every this many requests
+PROGRESS_EVERY = 100
+
+# Percentiles reported for every run - P99/P99.9 show the tail P95 hides
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+# Latency objective in ms - requests slower than this are counted
+SLO_MS = float(os.getenv('SLO_MS', '50'))
+
+# Test logs are stamped 1us apart from here - no clock read per log
+BASE_TIMESTAMP = datetime.now(timezone.utc)
+
+# A test log as json.dumps would encode it. Filled in with bytes %
+# formatting - no dict or encoder per log
+LOG_TEMPLATE = (
+    b'{"timestamp": "%s", "level": "INFO", "source": "%s", "application": "redis-benchmark", '
+    b'"message": "Test log message #%d", "metadata": {"test_id": %d}}'
+)
+
+
+def create_test_log(i, source=b'performance-test'):
+    """
+    Create an encoded test log entry
+    
+    Args:
+        i: Log number (message, test_id and timestamp offset)
+        source: Source field as bytes (must not need JSON escaping)
+    
+    Returns:
+        JSON bytes of the log object
+    """
+    timestamp = (BASE_TIMESTAMP + timedelta(microseconds=i)).isoformat().encode()
+    return LOG_TEMPLATE % (timestamp, source, i, i)
+
+
+def send_log(path, body):
+    """
+    POST one pre-encoded body (runs in a pool thread).
+    
+    Returns:
+        (latency ms, status code, error text) - latency and status are
+        None if the request failed
+    """
+    request_start = time.perf_counter_ns()
+    try:
+        response = POOL.request('POST', path, body=body, headers=JSON_HEADERS, timeout=5)
+    except Exception as e:
+        return None, None, str(e)[:100]
+    
+    latency = (time.perf_counter_ns() - request_start) / 1e6  # ns -> ms
+    error = response.data[:100].decode(errors='replace') if response.status != 202 else None
+    return latency, response.status, error
+
+
+def run_requests(path, bodies, concurrency, warmup_body):
+    """
+    POST every body concurrently and time the whole run.
+    
+    WARMUP_REQUESTS copies of warmup_body are sent first, untimed.
+    
+    Returns:
+        (send_log results in body order, total seconds)
+    """
+    results = []
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(partial(send_log, path), repeat(warmup_body, WARMUP_REQUESTS)))
+        
+        start_time = time.perf_counter()
+        # Results come back in submission order
+        for i, result in enumerate(executor.map(partial(send_log, path), bodies)):
+            results.append(result)
+            
+            # Progress indicator
+            if (i + 1) % PROGRESS_EVERY == 0:
+                rate = (i + 1) / (time.perf_counter() - start_time)
+                print(f"  Completed {i+1}/{len(bodies)} requests ({rate:.0f} req/sec)")
+    
+    return results, time.perf_counter() - start_time
+
+
+def send_scheduled(path, body, scheduled_at):
+    """
+    send_log for the open loop, also timing from the scheduled send.
+    
+    Returns:
+        (send_log result, ms from scheduled_at to the response)
+    """
+    result = send_log(path, body)
+    return result, (time.perf_counter() - scheduled_at) * 1000
+
+
+def run_open_loop(path, bodies, concurrency, warmup_body, rps):
+    """
+    POST bodies at a fixed rate, whether or not earlier ones finished.
+    
+    The closed loop (run_requests) only sends when a thread frees up,
+    so a slow server slows the sender and queueing never shows. Here
+    request i is due at start + i/rps; time it spends waiting for a
+    thread/connection counts in its response latency, while send_log's
+    latency is the service time alone.
+    
+    Returns:
+        (send_log results in body order, response latencies ms,
+        total seconds)
+    """
+    interval = 1 / rps
+    futures = []
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(partial(send_log, path), repeat(warmup_body, WARMUP_REQUESTS)))
+        
+        start_time = time.perf_counter()
+        for i, body in enumerate(bodies):
+            scheduled_at = start_time + i * interval
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(executor.submit(send_scheduled, path, body, scheduled_at))
+        
+        outcomes = [future.result() for future in futures]
+    
+    total_time = time.perf_counter() - start_time
+    results = [result for result, _ in outcomes]
+    response_latencies = [latency for result, latency in outcomes if result[0] is not None]
+    return results, response_latencies, total_time
+
+
+def percentile_ladder(latencies):
+    """Sort latencies in place and pick each of PERCENTILES from them"""
+    latencies.sort()
+    count = len(latencies)
+    if not count:
+        return dict.fromkeys(PERCENTILES, 0)
+    return {p: latencies[min(int(count * p / 100), count - 1)] for p in PERCENTILES}
+
+
+def report_results(endpoint, results, batch_sizes, total_time, response_latencies=None):
+    """
+    Compute and print metrics for one run.
+    
+    Args:
+        endpoint: API endpoint tested
+        results: send_log results, one per request
+        batch_sizes: Logs carried by each request
+        total_time: Seconds the whole run took
+        response_latencies: Open loop only - ms from each request's
+            scheduled send to its response
+    
+    Besides the readable block, one JSON line with the metrics is
+    printed so runs can be collected and compared by a script.
+    
+    Returns:
+        dict: Performance metrics (latencies are per request)
+    """
+    latencies = []
+    errors = 0
+    
+    for (latency, status, error), batch_size in zip(results, batch_sizes):
+        if latency is not None:
+            latencies.append(latency)
+        
+        if status != 202:
+            errors += batch_size
+            if errors == batch_size:  # Print first error
+                if status is None:
+                    print(f"Request failed: {error}")
+                else:
+                    print(f"Error: {status} - {error}")
+    
+    # Calculate metrics (sorted once - min, max and percentiles all index it)
+    percentiles = percentile_ladder(latencies)
+    if latencies:
+        avg_latency = sum(latencies) / len(latencies)
+        min_latency = latencies[0]
+        max_latency = latencies[-1]
+        over_slo = sum(1 for latency in latencies if latency > SLO_MS)
+    else:
+        avg_latency = min_latency = max_latency = 0
+        over_slo = 0
+    
+    num_logs = sum(batch_sizes)
+    throughput = (num_logs - errors) / total_time if total_time > 0 else 0
+    
+    # Print results
+    print(f"\nResults:")
+    print(f"  Total time: {total_time:.2f}s")
+    print(f"  Throughput: {throughput:.0f} logs/sec")
+    print(f"  Latency (avg): {avg_latency:.1f}ms")
+    print(f"  Latency (min): {min_latency:.1f}ms")
+    for p, latency in percentiles.items():
+        print(f"  Latency (p{p:g}): {latency:.1f}ms")
+    print(f"  Latency (max): {max_latency:.1f}ms")
+    if len(results) < num_logs:
+        print(f"  Latency per log (avg): {avg_latency * len(results) / num_logs:.3f}ms")
+    if response_latencies is not None:
+        # Open loop: service time above, service + queueing here
+        response_percentiles = percentile_ladder(response_latencies)
+        for p, latency in response_percentiles.items():
+            print(f"  Response latency (p{p:g}, incl. queueing): {latency:.1f}ms")
+    print(f"  Over {SLO_MS:g}ms SLO: {over_slo} requests")
+    print(f"  Errors: {errors}")
+    
+    metrics = {
+        'endpoint': endpoint,
+        'requests': len(results),
+        'logs': num_logs,
+        'total_time': total_time,
+        'throughput': throughput,
+        'avg_latency': avg_latency,
+        'min_latency': min_latency,
+        'max_latency': max_latency,
+        **{f"p{p:g}_latency".replace('.', ''): latency for p, latency in percentiles.items()},
+        'slo_ms': SLO_MS,
+        'over_slo': over_slo,
+        'errors': errors
+    }
+    if response_latencies is not None:
+        metrics.update({f"response_p{p:g}_latency".replace('.', ''): latency
+                        for p, latency in response_percentiles.items()})
+    print(json.dumps(metrics))
+    
+    return metrics
+
+
+def run(endpoint, num_logs, concurrency, batch_size=None, source='performance-test', rps=None):
+    """
+    Load-test one endpoint.
+    
+    Args:
+        endpoint: API endpoint (/logs or /logs/batch)
+        num_logs: Number of logs to send
+        concurrency: Requests in flight at once (pool threads)
+        batch_size: Logs per POST, sent as a JSON array (None: one log
+            object per POST)
+        source: Source field of the generated logs
+        rps: Open loop - send at this many requests/sec regardless of
+            responses (None: closed loop, next request when a thread
+            is free)
+    
+    Returns:
+        dict: Performance metrics
+    """
+    batching = f" in batches of {batch_size}" if batch_size else ""
+    pacing = f"open loop at {rps:g} req/s, " if rps else ""
+    print(f"\nTesting {endpoint} with {num_logs} logs{batching} ({pacing}{concurrency} concurrent)...")
+    print("-" * 60)
+    
+    # Encoded up front so the timed requests don't serialize anything
+    source = source.encode()
+    logs = [create_test_log(i, source) for i in range(num_logs)]
+    warmup_body = create_test_log(-1, source)
+    if batch_size:
+        batches = [logs[k:k + batch_size] for k in range(0, num_logs, batch_size)]
+        bodies = [b'[' + b', '.join(batch) + b']' for batch in batches]
+        batch_sizes = [len(batch) for batch in batches]
+        warmup_body = b'[' + warmup_body + b']'
+    else:
+        bodies = logs
+        batch_sizes = [1] * num_logs
+    
+    if rps:
+        results, response_latencies, total_time = run_open_loop(
+            endpoint, bodies, concurrency, warmup_body, rps
+        )
+        return report_results(endpoint, results, batch_sizes, total_time, response_latencies)
+    
+    results, total_time = run_requests(endpoint, bodies, concurrency, warmup_body)
+    return report_results(endpoint, results, batch_sizes, total_time)
+
+
+def run_redis_direct(num_logs, batch_size=500, source='performance-test'):
+    """
+    XADD logs straight to the Redis stream, bypassing the API.
+    
+    Writes the same stream entries as the API (RedisProducer's fields,
+    stream and MAXLEN) in pipelines of batch_size, so comparing with an
+    HTTP run shows how much of the time is the API rather than Redis.
+    
+    Args:
+        num_logs: Number of logs to write
+        batch_size: XADDs per pipeline round trip
+        source: Source field of the generated logs
+    
+    Returns:
+        dict: Performance metrics (latencies are per pipeline)
+    """
+    from src.queue.redis_producer import RedisProducer
+    
+    endpoint = 'redis XADD (direct)'
+    print(f"\nTesting {endpoint} with {num_logs} logs in pipelines of {batch_size}...")
+    print("-" * 60)
+    
+    producer = RedisProducer()
+    source = source.encode()
+    # Built up front so only the pipelines are timed
+    entries = [producer.build_fields(json.loads(create_test_log(i, source)))
+               for i in range(num_logs)]
+    batches = [entries[k:k + batch_size] for k in range(0, num_logs, batch_size)]
+    
+    results = []
+    start_time = time.perf_counter()
+    for batch in batches:
+        request_start = time.perf_counter_ns()
+        try:
+            pipe = producer.redis_client.pipeline(transaction=False)
+            for fields in batch:
+                pipe.xadd(producer.stream_name, fields,
+                          maxlen=producer.stream_maxlen, approximate=True)
+            pipe.execute()
+        except Exception as e:
+            results.append((None, None, str(e)[:100]))
+            continue
+        # Reported like an accepted HTTP request
+        results.append(((time.perf_counter_ns() - request_start) / 1e6, 202, None))
+    total_time = time.perf_counter() - start_time
+    
+    producer.close()
+    return report_results(endpoint, results, [len(batch) for batch in batches], total_time)
+
+
+def environment():
+    """Where and with what a run happened, to explain shifts between runs"""
+    return {
+        'hostname': socket.gethostname(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'urllib3': urllib3.__version__,
+        'api_url': API_URL,
+        'started': BASE_TIMESTAMP.isoformat()
+    }
+
+
+def save_results(path, results, **settings):
+    """
+    Write a run's metrics to a JSON file
+    
+    Args:
+        path: Output file
+        results: Metrics dicts from run() / run_redis_direct()
+        settings: Test settings to record (concurrency, mode, ...)
+    """
+    with open(path, 'w') as f:
+        json.dump({'environment': environment(), 'settings': settings, 'runs': results}, f, indent=2)
+    print(f"\nResults written to {path}")
+
+
+def compare_results(path, results):
+    """
+    Print throughput and P99 changes against a saved baseline
+    
+    Args:
+        path: JSON file from an earlier save_results()
+        results: Metrics dicts from this run
+    """
+    with open(path) as f:
+        baseline = {run['endpoint']: run for run in json.load(f)['runs']}
+    
+    print(f"\nCompared with {path}:")
+    for result in results:
+        before = baseline.get(result['endpoint'])
+        if before is None:
+            print(f"  {result['endpoint']}: not in baseline")
+            continue
+        
+        changes = []
+        for key, label in (('throughput', 'throughput'), ('p99_latency', 'p99')):
+            if before[key]:
+                changes.append(f"{label} {(result[key] - before[key]) / before[key]:+.1%}")
+        print(f"  {result['endpoint']}: {', '.join(changes) or 'no baseline values'}")
+
+
+def preflight():
+    """
+    Check the API and Redis are up before a run, so a dead server fails
+    fast instead of producing a page of timeouts.
+    
+    Returns:
+        True if /queue/status answered 200
+    """
+    try:
+        response = POOL.request('GET', '/queue/status', timeout=1)
+    except Exception as e:
+        print(f"API not reachable at {API_URL}: {e}")
+        return False
+    
+    if response.status != 200:
+        print(f"API not ready ({response.status}): {response.data[:100].decode(errors='replace')}")
+        return False
+    return True
+
+
+def check_queue_status():
+    """Check Redis queue status"""
+    try:
+        response = POOL.request('GET', '/queue/status', timeout=5)
+        if response.status == 200:
+            data = json.loads(response.data)
+            print("\nQueue Status:")
+            print(f"  Messages in queue: {data.get('queue_length', 0)}")
+            print(f"  Consumer groups:   {data.get('consumer_groups', 0)}")
+            print(f"  Messages sent:     {data.get('messages_sent', 0)}")
+        else:
+            print(f"Could not get queue status: {response.status}")
+    except Exception as e:
+        print(f"Error checking queue: {e}")
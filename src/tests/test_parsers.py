@@ -4,7 +4,9 @@ Parser Test Suite
 Tests all log parsers with sample logs from each format.
 """
 
+import os
 import sys
+import tempfile
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
@@ -37,6 +39,16 @@ def test_json_parser():
             print(f"  Message: {parsed['message']}")
         else:
             print("✗ Parsing failed")
+    
+    # Same parser, schema changes between lines - the earlier line must
+    # not stop higher-priority field names winning on the next one
+    print("\nTest schema change:")
+    parser.parse('{"msg":"a","name":"x"}')
+    parsed = parser.parse('{"message":"REAL","msg":"alias","service":"svc","name":"logger"}')
+    if parsed and parsed['message'] == 'REAL' and parsed['application'] == 'svc':
+        print("✓ Schema change handled: message=REAL, application=svc")
+    else:
+        print(f"✗ Schema change mis-parsed: {parsed}")
 
 
 def test_apache_parser():
@@ -67,6 +79,15 @@ def test_apache_parser():
             print(f"  Status: {parsed['metadata']['status_code']}")
         else:
             print("✗ Parsing failed")
+    
+    # Single-digit day - too short for the fixed-width slicing, so it
+    # goes through the strptime fallback
+    print("\nTest single-digit day:")
+    parsed = parser.parse('192.168.1.1 - - [1/Nov/2025:16:00:00 +0000] "GET /test HTTP/1.1" 200 123')
+    if parsed and parsed['timestamp'] == '2025-11-01T16:00:00':
+        print("✓ Single-digit day parsed: 2025-11-01T16:00:00")
+    else:
+        print(f"✗ Single-digit day mis-parsed: {parsed}")
 
 
 def test_syslog_parser():
@@ -98,6 +119,24 @@ def test_syslog_parser():
             print(f"  Facility: {parsed['metadata'].get('facility', 'N/A')}")
         else:
             print("✗ Parsing failed")
+    
+    # RFC 5424 structured data: several elements, and a ']' inside a
+    # quoted value, must be split from the message intact
+    print("\nTest structured data:")
+    cases = [
+        ('<34>1 2025-11-11T16:00:00Z server1 app 1234 ID47 '
+         '[exampleSDID@32473 iut="3" eventSource="App]lication"][meta@1 x="y"] Event occurred',
+         '[exampleSDID@32473 iut="3" eventSource="App]lication"][meta@1 x="y"]', 'Event occurred'),
+        ('<34>1 2025-11-11T16:00:00Z server1 app 1234 ID47 - Event occurred',
+         None, 'Event occurred'),
+    ]
+    for log, structured, message in cases:
+        parsed = parser.parse(log)
+        if (parsed and parsed['message'] == message and
+                parsed['metadata'].get('structured_data') == structured):
+            print(f"✓ Structured data split: {structured or '-'}")
+        else:
+            print(f"✗ Structured data mis-parsed: {parsed}")
 
 
 def test_regex_parser():
@@ -165,6 +204,43 @@ def test_parser_factory():
             print("✗ Auto-parsing failed")
 
 
+def test_batch_parsing():
+    """Test ParserFactory.parse_batch and parse_file on mixed input"""
+    print("\n" + "=" * 60)
+    print("Testing Batch and File Parsing")
+    print("=" * 60)
+    
+    factory = ParserFactory()
+    
+    # Mixed formats, CRLF endings, blank lines and broken JSON
+    lines = [
+        '{"timestamp":"2025-11-11T16:00:00","level":"INFO","message":"Test JSON log"}\r',
+        '',
+        '{"level":"INFO", broken',
+        '192.168.1.1 - - [11/Nov/2025:16:00:00 +0000] "GET /test HTTP/1.1" 200 123\r',
+        '   ',
+        '<34>1 2025-11-11T16:00:00Z server1 app 123 - - Test syslog message\r',
+    ]
+    expected = ['Test JSON log', None, None, 'GET /test 200 123', None, 'Test syslog message']
+    
+    with tempfile.NamedTemporaryFile('w', suffix='.log', delete=False, newline='') as f:
+        f.write('\n'.join(lines) + '\n')
+    try:
+        sources = [
+            ('parse_batch', factory.parse_batch(lines)),
+            ('parse_file', list(factory.parse_file(f.name))),
+        ]
+    finally:
+        os.unlink(f.name)
+    
+    for name, results in sources:
+        messages = [parsed['message'] if parsed else None for parsed in results]
+        if messages == expected:
+            print(f"✓ {name}: {len(expected)} lines, {sum(m is not None for m in messages)} parsed")
+        else:
+            print(f"✗ {name} mis-parsed: {messages}")
+
+
 def main():
     """Run all parser tests"""
     print("\n" + "=" * 70)
@@ -176,6 +252,7 @@ def main():
     test_syslog_parser()
     test_regex_parser()
     test_parser_factory()
+    test_batch_parsing()
     
     print("\n" + "=" * 70)
     print(" " * 25 + "TESTS COMPLETE")
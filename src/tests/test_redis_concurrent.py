@@ -3,125 +3,31 @@ Concurrent Redis Queue Test
 Uses threading to send multiple requests in parallel (realistic load test).
 """
 
-import requests
+import argparse
+import sys
 import time
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-
-def create_test_log(i):
-    """Generate a test log"""
-    return {
-        'timestamp': datetime.now().isoformat(),
-        'level': 'INFO',
-        'source': 'concurrent-test',
-        'application': 'redis-queue',
-        'message': f'Test log message #{i}',
-        'metadata': {'test_id': i}
-    }
-
-
-def send_log(i, url):
-    """Send a single log (runs in thread)"""
-    try:
-        log_data = create_test_log(i)
-        start = time.time()
-        response = requests.post(url, json=log_data, timeout=5)
-        latency = (time.time() - start) * 1000
-        
-        return {
-            'success': response.status_code == 202,
-            'latency': latency,
-            'status': response.status_code
-        }
-    except Exception as e:
-        return {
-            'success': False,
-            'latency': 0,
-            'error': str(e)
-        }
-
-
-def test_concurrent(num_logs=1000, max_workers=50):
-    """
-    Send logs concurrently using thread pool.
-    
-    Args:
-        num_logs: Total logs to send
-        max_workers: Number of concurrent threads
-    """
-    url = 'http://127.0.0.1:5000/logs'  
-    
-    print(f"\nSending {num_logs} logs with {max_workers} concurrent threads...")
-    print("-" * 60)
-    
-    start_time = time.time()
-    results = []
-    
-    # Send requests concurrently
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        futures = [executor.submit(send_log, i, url) for i in range(num_logs)]
-        
-        # Collect results as they complete
-        for i, future in enumerate(as_completed(futures)):
-            result = future.result()
-            results.append(result)
-            
-            # Progress indicator
-            if (i + 1) % 100 == 0:
-                elapsed = time.time() - start_time
-                rate = (i + 1) / elapsed
-                print(f"  Completed {i+1}/{num_logs} requests ({rate:.0f} req/sec)")
-    
-    total_time = time.time() - start_time
-    
-    # Calculate statistics
-    successes = sum(1 for r in results if r['success'])
-    errors = len(results) - successes
-    latencies = [r['latency'] for r in results if r['success']]
-    
-    avg_latency = sum(latencies) / len(latencies) if latencies else 0
-    p50_latency = sorted(latencies)[int(len(latencies) * 0.50)] if latencies else 0
-    p95_latency = sorted(latencies)[int(len(latencies) * 0.95)] if latencies else 0
-    p99_latency = sorted(latencies)[int(len(latencies) * 0.99)] if latencies else 0
-    throughput = successes / total_time if total_time > 0 else 0
-    
-    # Print results
-    print("\n" + "=" * 60)
-    print("CONCURRENT REDIS QUEUE PERFORMANCE")
-    print("=" * 60)
-    print(f"Total requests:      {num_logs}")
-    print(f"Concurrent threads:  {max_workers}")
-    print(f"Successful:          {successes}")
-    print(f"Errors:              {errors}")
-    print(f"Total time:          {total_time:.2f} seconds")
-    print(f"Throughput:          {throughput:.0f} logs/sec")
-    print("-" * 60)
-    print(f"Average latency:     {avg_latency:.2f} ms")
-    print(f"P50 latency:         {p50_latency:.2f} ms")
-    print(f"P95 latency:         {p95_latency:.2f} ms")
-    print(f"P99 latency:         {p99_latency:.2f} ms")
-    print("=" * 60)
-
-
-def check_queue_status():
-    """Check Redis queue status"""
-    try:
-        response = requests.get('http://127.0.0.1:5000/queue/status')
-        if response.status_code == 200:
-            data = response.json()
-            print("\nQueue Status:")
-            print(f"  Messages in queue: {data.get('queue_length', 0)}")
-            print(f"  Consumer groups:   {data.get('consumer_groups', 0)}")
-            print(f"  Messages sent:     {data.get('messages_sent', 0)}")
-        else:
-            print(f"Could not get queue status: {response.status_code}")
-    except Exception as e:
-        print(f"Error checking queue: {e}")
+from src.tests._perf_common import (
+    run, preflight, check_queue_status, save_results, compare_results, POOL
+)
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Concurrent Redis queue load test')
+    parser.add_argument('--logs', type=int, default=1000,
+                        help='Number of logs to send (default: 1000)')
+    parser.add_argument('--concurrency', type=int, default=50,
+                        help='Concurrent threads (default: 50)')
+    parser.add_argument('--interactive', action='store_true',
+                        help='Wait for Enter before starting (default: start right away)')
+    parser.add_argument('--json-out', metavar='PATH',
+                        help='Also write the results (and environment) to a JSON file')
+    parser.add_argument('--baseline', metavar='PATH',
+                        help='Compare with a --json-out file from an earlier run')
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("Concurrent Redis Queue Performance Test")
     print("=" * 60)
@@ -131,13 +37,21 @@ def main():
     print("  2. Redis is running (docker ps | grep redis)")
     print("  3. Workers are running (python -m src.queue.worker_pool)")
     
+    if not preflight():
+        sys.exit(2)
+    
     # Check initial queue status
     check_queue_status()
     
-    input("\nPress Enter to start test...")
+    if args.interactive:
+        input("\nPress Enter to start test...")
     
-    # Test with 1000 logs, 50 concurrent threads
-    test_concurrent(num_logs=1000, max_workers=50)
+    results = [run('/logs', args.logs, args.concurrency, source='concurrent-test')]
+    
+    if args.baseline:
+        compare_results(args.baseline, results)
+    if args.json_out:
+        save_results(args.json_out, results, concurrency=args.concurrency)
     
     print("\nWaiting 10 seconds for workers to process...")
     time.sleep(10)
@@ -150,5 +64,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        POOL.close()
 
@@ -4,115 +4,20 @@ Performance Test - Redis Queue Ingestion
 Tests the performance of the Redis-based log ingestion endpoint.
 """
 
-import requests
+import argparse
+import os
+import sys
 import time
-from datetime import datetime, timezone
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
+from src.tests._perf_common import (
+    run, run_redis_direct, preflight, check_queue_status, save_results, compare_results,
+    POOL
+)
 
-BASE_URL = 'http://127.0.0.1:5000'  
-
-
-def create_test_log(i):
-    """Create a test log entry"""
-    return {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "level": "INFO",
-        "source": "performance-test",
-        "application": "redis-benchmark",
-        "message": f"Performance test log #{i}",
-        "metadata": {"test_id": i, "batch": "performance"}
-    }
-
-
-def test_endpoint(endpoint, num_logs=100):
-    """
-    Test the endpoint's performance.
-    
-    Args:
-        endpoint: API endpoint (/logs)
-        num_logs: Number of logs to send
-        
-    Returns:
-        dict: Performance metrics
-    """
-    print(f"\nTesting {endpoint} with {num_logs} logs...")
-    print("-" * 60)
-    
-    url = f"{BASE_URL}{endpoint}"
-    
-    latencies = []
-    errors = 0
-    
-    start_time = time.time()
-    
-    for i in range(num_logs):
-        log_data = create_test_log(i)
-        
-        request_start = time.time()
-        
-        try:
-            response = requests.post(url, json=log_data, timeout=5)
-            request_time = (time.time() - request_start) * 1000  # Convert to ms
-            
-            latencies.append(request_time)
-            
-            if response.status_code not in [201, 202]:
-                errors += 1
-                if errors == 1:  # Print first error
-                    print(f"Error: {response.status_code} - {response.text[:100]}")
-        
-        except Exception as e:
-            errors += 1
-            if errors == 1:
-                print(f"Request failed: {e}")
-    
-    total_time = time.time() - start_time
-    
-    # Calculate metrics
-    if latencies:
-        avg_latency = sum(latencies) / len(latencies)
-        min_latency = min(latencies)
-        max_latency = max(latencies)
-        p95_latency = sorted(latencies)[int(len(latencies) * 0.95)]
-    else:
-        avg_latency = min_latency = max_latency = p95_latency = 0
-    
-    throughput = num_logs / total_time if total_time > 0 else 0
-    
-    # Print results
-    print(f"\nResults:")
-    print(f"  Total time: {total_time:.2f}s")
-    print(f"  Throughput: {throughput:.0f} logs/sec")
-    print(f"  Latency (avg): {avg_latency:.1f}ms")
-    print(f"  Latency (min): {min_latency:.1f}ms")
-    print(f"  Latency (max): {max_latency:.1f}ms")
-    print(f"  Latency (p95): {p95_latency:.1f}ms")
-    print(f"  Errors: {errors}")
-    
-    return {
-        'endpoint': endpoint,
-        'total_time': total_time,
-        'throughput': throughput,
-        'avg_latency': avg_latency,
-        'p95_latency': p95_latency,
-        'errors': errors
-    }
-
-
-def check_queue_status():
-    """Check Redis queue status"""
-    try:
-        response = requests.get(f"{BASE_URL}/queue/status")
-        if response.status_code == 200:
-            data = response.json()
-            print(f"\nQueue Status:")
-            print(f"  Queue length: {data['queue_length']}")
-            print(f"  Messages sent: {data['messages_sent']}")
-            print(f"  Consumer groups: {data['consumer_groups']}")
-        else:
-            print(f"Queue status unavailable: {response.status_code}")
-    except Exception as e:
-        print(f"Could not check queue status: {e}")
+# Logs per POST for the /logs/batch test
+LOG_BATCH_SIZE = int(os.getenv('LOG_BATCH_SIZE', '100'))
 
 
 def main():
@@ -126,12 +31,41 @@ def main():
     print("  3. Workers are running (python -m src.queue.worker_pool)")
     print()
     
-    input("Press Enter to start test...")
-    
-    num_logs = 500
-    
-    # Test logs endpoint
-    result = test_endpoint('/logs', num_logs)
+    parser = argparse.ArgumentParser(description='Log ingestion performance test')
+    parser.add_argument('--logs', type=int, default=500,
+                        help='Number of logs to send (default: 500)')
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help='Requests in flight at once, e.g. 1/4/16/64 (default: 16)')
+    parser.add_argument('--batch-size', type=int, default=LOG_BATCH_SIZE,
+                        help=f'Logs per /logs/batch POST (default: LOG_BATCH_SIZE or {LOG_BATCH_SIZE})')
+    parser.add_argument('--mode', choices=['closed', 'open'], default='closed',
+                        help='closed: send when a thread is free; open: send at --rps (default: closed)')
+    parser.add_argument('--rps', type=float, default=500,
+                        help='Requests/sec in open mode (default: 500)')
+    parser.add_argument('--interactive', action='store_true',
+                        help='Wait for Enter before starting (default: start right away)')
+    parser.add_argument('--redis-direct', action='store_true',
+                        help='Also XADD the logs straight to Redis, to compare against the API')
+    parser.add_argument('--json-out', metavar='PATH',
+                        help='Also write the results (and environment) to a JSON file')
+    parser.add_argument('--baseline', metavar='PATH',
+                        help='Compare with a --json-out file from an earlier run')
+    args = parser.parse_args()
+    rps = args.rps if args.mode == 'open' else None
+    
+    if args.interactive:
+        input("Press Enter to start test...")
+    
+    if not preflight():
+        sys.exit(2)
+    
+    # Test logs endpoint, then the same logs batched
+    results = [
+        run('/logs', args.logs, args.concurrency, rps=rps),
+        run('/logs/batch', args.logs, args.concurrency, batch_size=args.batch_size, rps=rps)
+    ]
+    if args.redis_direct:
+        results.append(run_redis_direct(args.logs))
     
     # Check queue
     time.sleep(1)
@@ -142,11 +76,27 @@ def main():
     print("Test Summary")
     print("=" * 60)
     
-    print(f"\nEndpoint: /logs")
-    print(f"  Throughput: {result['throughput']:.0f} logs/sec")
-    print(f"  Avg Latency: {result['avg_latency']:.1f}ms")
-    print(f"  P95 Latency: {result['p95_latency']:.1f}ms")
-    print(f"  Errors: {result['errors']}")
+    for result in results:
+        print(f"\nEndpoint: {result['endpoint']} ({args.concurrency} concurrent)")
+        print(f"  Throughput: {result['throughput']:.0f} logs/sec")
+        print(f"  Avg Latency: {result['avg_latency']:.1f}ms")
+        print(f"  P50 Latency: {result['p50_latency']:.1f}ms")
+        print(f"  P95 Latency: {result['p95_latency']:.1f}ms")
+        print(f"  P99 Latency: {result['p99_latency']:.1f}ms")
+        print(f"  P99.9 Latency: {result['p999_latency']:.1f}ms")
+        print(f"  Over SLO: {result['over_slo']} requests")
+        print(f"  Errors: {result['errors']}")
+    
+    if args.redis_direct and results[-1]['throughput']:
+        # Share of the direct Redis ceiling the batched API reaches
+        ratio = results[1]['throughput'] / results[-1]['throughput']
+        print(f"\n/logs/batch reaches {ratio:.0%} of direct Redis throughput")
+    
+    if args.baseline:
+        compare_results(args.baseline, results)
+    if args.json_out:
+        save_results(args.json_out, results, concurrency=args.concurrency, mode=args.mode,
+                     rps=rps, batch_size=args.batch_size)
     
     print("\n" + "=" * 60)
     
@@ -156,5 +106,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        POOL.close()
 
@@ -3,114 +3,36 @@ Simple Redis Queue Test
 Tests the Redis queue ingestion without comparing to direct DB writes.
 """
 
-import requests
+import argparse
+import sys
 import time
-from datetime import datetime
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-
-def create_test_log(i):
-    """Generate a test log"""
-    return {
-        'timestamp': datetime.now().isoformat(),
-        'level': 'INFO',
-        'source': 'performance-test',
-        'application': 'redis-queue',
-        'message': f'Test log message #{i}',
-        'metadata': {'test_id': i}
-    }
-
-
-def test_redis_queue(num_logs=1000):
-    """
-    Send logs to Redis queue and measure performance.
-    """
-    url = 'http://127.0.0.1:5000/logs'  
-    
-    print(f"\nSending {num_logs} logs to Redis queue...")
-    print("-" * 60)
-    
-    start_time = time.time()
-    success = 0
-    errors = 0
-    latencies = []
-    
-    for i in range(num_logs):
-        log_data = create_test_log(i)
-        
-        request_start = time.time()
-        
-        try:
-            response = requests.post(url, json=log_data, timeout=5)
-            request_time = (time.time() - request_start) * 1000  # Convert to ms
-            
-            latencies.append(request_time)
-            
-            if response.status_code == 202:
-                success += 1
-            else:
-                errors += 1
-                if errors == 1:
-                    print(f"Error: {response.status_code} - {response.text[:100]}")
-        
-        except Exception as e:
-            errors += 1
-            if errors == 1:
-                print(f"Request failed: {str(e)[:100]}")
-        
-        # Progress indicator
-        if (i + 1) % 100 == 0:
-            elapsed = time.time() - start_time
-            rate = (i + 1) / elapsed
-            print(f"  Sent {i+1}/{num_logs} logs ({rate:.0f} logs/sec)")
-    
-    total_time = time.time() - start_time
-    
-    # Calculate statistics
-    avg_latency = sum(latencies) / len(latencies) if latencies else 0
-    p95_latency = sorted(latencies)[int(len(latencies) * 0.95)] if latencies else 0
-    p99_latency = sorted(latencies)[int(len(latencies) * 0.99)] if latencies else 0
-    throughput = success / total_time if total_time > 0 else 0
-    
-    # Print results
-    print("\n" + "=" * 60)
-    print("REDIS QUEUE PERFORMANCE")
-    print("=" * 60)
-    print(f"Total logs sent:     {num_logs}")
-    print(f"Successful:          {success}")
-    print(f"Errors:              {errors}")
-    print(f"Total time:          {total_time:.2f} seconds")
-    print(f"Throughput:          {throughput:.0f} logs/sec")
-    print(f"Average latency:     {avg_latency:.2f} ms")
-    print(f"P95 latency:         {p95_latency:.2f} ms")
-    print(f"P99 latency:         {p99_latency:.2f} ms")
-    print("=" * 60)
-    
-    return {
-        'success': success,
-        'errors': errors,
-        'total_time': total_time,
-        'throughput': throughput,
-        'avg_latency': avg_latency
-    }
-
-
-def check_queue_status():
-    """Check Redis queue status"""
-    try:
-        response = requests.get('http://127.0.0.1:5000/queue/status')
-        if response.status_code == 200:
-            data = response.json()
-            print("\nQueue Status:")
-            print(f"  Messages in queue: {data.get('queue_length', 0)}")
-            print(f"  Consumer groups:   {data.get('consumer_groups', 0)}")
-            print(f"  Messages sent:     {data.get('messages_sent', 0)}")
-        else:
-            print(f"Could not get queue status: {response.status_code}")
-    except Exception as e:
-        print(f"Error checking queue: {e}")
+from src.tests._perf_common import (
+    run, preflight, check_queue_status, save_results, compare_results, POOL
+)
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Redis queue performance test')
+    parser.add_argument('--logs', type=int, default=1000,
+                        help='Number of logs to send (default: 1000)')
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help='Requests in flight at once, e.g. 1/4/16/64 (default: 16)')
+    parser.add_argument('--mode', choices=['closed', 'open'], default='closed',
+                        help='closed: send when a thread is free; open: send at --rps (default: closed)')
+    parser.add_argument('--rps', type=float, default=500,
+                        help='Requests/sec in open mode (default: 500)')
+    parser.add_argument('--interactive', action='store_true',
+                        help='Wait for Enter before starting (default: start right away)')
+    parser.add_argument('--json-out', metavar='PATH',
+                        help='Also write the results (and environment) to a JSON file')
+    parser.add_argument('--baseline', metavar='PATH',
+                        help='Compare with a --json-out file from an earlier run')
+    args = parser.parse_args()
+    rps = args.rps if args.mode == 'open' else None
+    
     print("=" * 60)
     print("Redis Queue Performance Test")
     print("=" * 60)
@@ -120,13 +42,21 @@ def main():
     print("  3. Workers are running (python -m src.queue.worker_pool)")
     print()
     
+    if not preflight():
+        sys.exit(2)
+    
     # Check initial queue status
     check_queue_status()
     
-    input("\nPress Enter to start test...")
+    if args.interactive:
+        input("\nPress Enter to start test...")
     
-    # Test with 1000 logs
-    test_redis_queue(1000)
+    results = [run('/logs', args.logs, args.concurrency, source='simple-test', rps=rps)]
+    
+    if args.baseline:
+        compare_results(args.baseline, results)
+    if args.json_out:
+        save_results(args.json_out, results, concurrency=args.concurrency, mode=args.mode, rps=rps)
     
     print("\nWaiting 5 seconds for workers to process...")
     time.sleep(5)
@@ -139,5 +69,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        POOL.close()
 